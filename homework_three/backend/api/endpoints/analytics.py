@@ -0,0 +1,139 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from typing import Optional
+from backend.database.setup_database import get_database
+from backend.app.analytics.indicator_config import INDICATOR_CONFIG, TIMEFRAMES, get_indicator_params
+from backend.app.analytics.indicators import calculate_indicator, to_series
+from backend.app.analytics.series import load_frame, load_frames, format_dates
+from backend.app.analytics.strategy_config import STRATEGY_CONFIG, get_strategy_params
+from backend.app.analytics.backtest import run_backtest
+from backend.api.response_formats import negotiated_response
+
+router = APIRouter()
+
+
+@router.get("/indicator")
+def get_indicator(
+        request: Request,
+        symbol: str = Query(
+            ...,
+            description="Symbol to calculate the indicator for",
+            example="ADIN"
+        ),
+        indicator: str = Query(
+            ...,
+            description=f"Indicator name, one of: {', '.join(INDICATOR_CONFIG)}",
+            example="SMA"
+        ),
+        timeframe: str = Query(
+            "day",
+            description="Timeframe of the bars the indicator is calculated on: day, week or month",
+            example="day"
+        )
+):
+    db = get_database()
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"timeframe must be one of: {', '.join(TIMEFRAMES)}."
+        )
+
+    params = get_indicator_params(indicator, timeframe)
+    if params is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Indicator '{indicator}' is not recognized."
+        )
+
+    frame = load_frame(db, symbol, timeframe)
+    if len(frame["date"]) == 0:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No historical data found for symbol '{symbol}'."
+        )
+
+    values = calculate_indicator(indicator, frame, params)
+
+    return negotiated_response(
+        request,
+        {
+            "symbol": symbol,
+            "indicator": indicator,
+            "timeframe": timeframe,
+            "params": params
+        },
+        {"series": to_series(format_dates(frame["date"]), values)}
+    )
+
+
+@router.get("/backtest")
+def get_backtest(
+        strategy: Optional[str] = Query(
+            None,
+            description=f"Strategy name, one of: {', '.join(STRATEGY_CONFIG)}. All strategies when omitted",
+            example="RSI2"
+        ),
+        symbol: Optional[str] = Query(
+            None,
+            description="Symbol to backtest. Every watched issuer when omitted",
+            example="ADIN"
+        ),
+        timeframe: str = Query(
+            "day",
+            description="Timeframe of the bars the strategy runs on: day, week or month",
+            example="day"
+        ),
+        actions: bool = Query(
+            True,
+            description="Include the per-bar buy (1) / hold (0) / sell (-1) actions"
+        )
+):
+    db = get_database()
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"timeframe must be one of: {', '.join(TIMEFRAMES)}."
+        )
+
+    if strategy and strategy not in STRATEGY_CONFIG:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Strategy '{strategy}' is not recognized."
+        )
+    strategies = [strategy] if strategy else list(STRATEGY_CONFIG)
+
+    if symbol:
+        symbols = [symbol]
+    else:
+        symbols = [issuer["symbol"] for issuer in db.issuers.find({"is_watched": True}, {"_id": 0, "symbol": 1})]
+
+    frames = load_frames(db, symbols, timeframe)
+    if symbol and len(frames[symbol]["date"]) == 0:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No historical data found for symbol '{symbol}'."
+        )
+
+    results = []
+    for frame_symbol, frame in frames.items():
+        if len(frame["date"]) == 0:
+            continue
+        dates = format_dates(frame["date"]) if actions else None
+        for strategy_name in strategies:
+            params = get_strategy_params(strategy_name, timeframe)
+            strategy_actions, metrics = run_backtest(strategy_name, frame, params)
+            result = {
+                "symbol": frame_symbol,
+                "strategy": strategy_name,
+                "params": params,
+                "metrics": metrics
+            }
+            if actions:
+                result["actions"] = [
+                    {"date": date, "action": action} for date, action in zip(dates, strategy_actions.tolist())
+                ]
+            results.append(result)
+
+    return {
+        "timeframe": timeframe,
+        "results": results
+    }
\ No newline at end of file
@@ -1,15 +1,28 @@
 from fastapi import APIRouter
 from backend.database.setup_database import get_database
+from backend.database.async_database import find_one
+from backend.database.indexes import index_usage_stats
+from backend.api.read_cache import read_cache
 
 router = APIRouter()
 
-db = get_database()
-
 @router.get("/app-status")
-def get_app_status():
-    status = db.app_status.find_one({}, {
+async def get_app_status():
+    status = await find_one("app_status", {}, {
         "_id": 0,
         "status": 1,
-        "details": 1
+        "details": 1,
+        "job": 1
     })
-    return status
\ No newline at end of file
+    return status
+
+
+@router.get("/index-stats")
+def get_index_stats():
+    db = get_database()
+    return index_usage_stats(db)
+
+
+@router.get("/cache-stats")
+def get_cache_stats():
+    return read_cache.stats()
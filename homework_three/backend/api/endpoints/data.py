@@ -1,46 +1,136 @@
-from fastapi import APIRouter, HTTPException, Query
+from datetime import timedelta
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from typing import Optional
 from backend.database.setup_database import get_database
+from backend.database.entry_format import DATA_ENTRIES_COMPAT_MODE, format_entry_date, parse_entry_date, \
+    to_response_entry
+from backend.database.price_storage import PERIOD_COLLECTIONS, find_entries, find_period_bars, latest_entry_date
+from backend.app.analytics.series import fill_entries
+from backend.database.async_database import find_all
+from backend.database.data_versions import get_data_version_async, get_symbol_versions
+from backend.api.read_cache import cached, cached_async
+from backend.api.etags import make_etag, matches_if_none_match, not_modified
+from backend.api.response_formats import HISTORY_STREAM_BATCH_SIZE, STREAM_MEDIA_TYPES, batched, fill_batches, \
+    negotiate_format, negotiated_response, preferred_encoding, stream_rows
 
 router = APIRouter()
 
-db = get_database()
+async def issuer_list(request, response, name, query, projection):
+    # The issuer lists run on the event loop: the ETag's data version and the issuers are read through the async
+    # driver, or in a worker thread when it is not installed.
+    version = await get_data_version_async()
+    etag = make_etag(name, version)
+    if matches_if_none_match(request, etag):
+        return not_modified(etag)
+    response.headers["ETag"] = etag
+
+    return await cached_async(name, lambda: find_all("issuers", query, {"_id": 0, **projection}), version=version)
+
 
 @router.get("/filter-one-data")
-def get_issuers():
-    issuers = list(db.issuers.find({}, {
-        "_id": 0,
+async def get_issuers(request: Request, response: Response):
+    return await issuer_list(request, response, "filter-one-data", {}, {
         "symbol": 1,
         "is_bond": 1,
         "has_digit": 1,
         "valid": 1,
         "last_scraped_date": 1
-    }))
-    return issuers
+    })
 
 @router.get("/get-watched-issuers")
-def get_watched_issuers():
-    issuers = list(db.issuers.find({
+async def get_watched_issuers(request: Request, response: Response):
+    return await issuer_list(request, response, "watched-issuers", {
         "is_watched": True
     }, {
-        "_id": 0,
         "symbol": 1,
-    }))
-    return issuers
+    })
 
 @router.get("/get-valid-issuers")
-def get_valid_issuers():
-    issuers = list(db.issuers.find({
+async def get_valid_issuers(request: Request, response: Response):
+    return await issuer_list(request, response, "valid-issuers", {
         "valid": True
     }, {
-        "_id": 0,
         "symbol": 1,
-    }))
-    return issuers
+    })
+
+
+TIMEFRAMES = ["day"] + list(PERIOD_COLLECTIONS)
+
+
+def parse_date_param(name, value):
+    if value is None:
+        return None
+    try:
+        return parse_entry_date(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400,
+            detail=f"{name} must be a date in the YYYY-MM-DD format."
+        )
+
+
+def fill_seed(symbol, date_from, after):
+    db = get_database()
+    # The stored entry whose values carry over into the first filled days: the cursor row itself when paging,
+    # otherwise the last entry before the requested range.
+    seed_date = after
+    if seed_date is None and date_from is not None:
+        seed_date = latest_entry_date(db, symbol, before=date_from)
+    if seed_date is None:
+        return []
+    return list(find_entries(db, symbol, date_from=seed_date, date_to=seed_date))
+
+
+def history_entries(symbol, timeframe, date_from=None, date_to=None, after=None, limit=None, batch_size=None):
+    db = get_database()
+    if timeframe == "day":
+        return find_entries(db, symbol, date_from=date_from, date_to=date_to, after=after, limit=limit,
+                            batch_size=batch_size)
+    return find_period_bars(db, symbol, timeframe, date_from=date_from, date_to=date_to, after=after, limit=limit,
+                            batch_size=batch_size)
+
+
+def fill_start(date_from, after):
+    return after + timedelta(days=1) if after is not None else date_from
+
+
+def load_history(symbol, timeframe, date_from=None, date_to=None, after=None, limit=None, fill=False,
+                 compat=DATA_ENTRIES_COMPAT_MODE, version=None):
+    # Returns the page of response entries and the cursor of the next page, or None on the last page. The symbol's
+    # data version, when given, is the one the page is cached under.
+    return cached("history", lambda: read_history(symbol, timeframe, date_from, date_to, after, limit, fill, compat),
+                  symbol, timeframe, date_from, date_to, after, limit, fill, compat, version=version)
+
+
+def read_history(symbol, timeframe, date_from, date_to, after, limit, fill, compat):
+    entries = list(history_entries(symbol, timeframe, date_from, date_to, after, limit))
+
+    cursor = None
+    if limit is not None and len(entries) == limit:
+        cursor = format_entry_date(entries[-1]["date"])
+
+    if fill and timeframe == "day" and entries:
+        entries = fill_entries(symbol, fill_seed(symbol, date_from, after) + entries,
+                               start=fill_start(date_from, after))
+
+    return [to_response_entry(entry, compat=compat) for entry in entries], cursor
+
+
+def stream_history(pages, timeframe, date_from, date_to, limit, fill, batch_size):
+    # Yields batches of response entries straight from the cursors, symbol after symbol.
+    for symbol, after in pages:
+        batches = batched(history_entries(symbol, timeframe, date_from, date_to, after, limit, batch_size),
+                          batch_size)
+        if fill and timeframe == "day":
+            batches = fill_batches(symbol, batches, seed=fill_seed(symbol, date_from, after),
+                                   start=fill_start(date_from, after))
+        for batch in batches:
+            yield [to_response_entry(entry) for entry in batch]
 
 
 @router.get("/filter-three-data")
 def get_historical_data(
+        request: Request,
         symbolOne: Optional[str] = Query(
             None,
             description="First symbol to filter data",
@@ -50,9 +140,69 @@ def get_historical_data(
             None,
             description="Second symbol to filter data (requires symbolOne and must be different)",
             example="OTHER"
+        ),
+        timeframe: str = Query(
+            "day",
+            description="Daily entries, or the stored weekly or monthly bars",
+            example="week"
+        ),
+        date_from: Optional[str] = Query(
+            None,
+            alias="from",
+            description="First date to return (YYYY-MM-DD)",
+            example="2024-01-01"
+        ),
+        date_to: Optional[str] = Query(
+            None,
+            alias="to",
+            description="Last date to return (YYYY-MM-DD)",
+            example="2024-03-31"
+        ),
+        fill: bool = Query(
+            False,
+            description="Forward fill daily entries over every calendar day, like the charts expect"
+        ),
+        limit: Optional[int] = Query(
+            None,
+            ge=1,
+            description="Maximum number of stored entries per symbol"
+        ),
+        after: Optional[str] = Query(
+            None,
+            description="Cursor for symbolOne: the next value returned by the previous page",
+            example="2024-02-15"
+        ),
+        afterTwo: Optional[str] = Query(
+            None,
+            description="Cursor for symbolTwo: the nextTwo value returned by the previous page",
+            example="2024-02-15"
+        ),
+        format: str = Query(
+            "json",
+            description="json, or ndjson/csv to stream the rows of both symbols as they are read",
+            example="ndjson"
+        ),
+        batch_size: int = Query(
+            HISTORY_STREAM_BATCH_SIZE,
+            ge=1,
+            le=10000,
+            description="Rows per database round trip when streaming"
         )
 ):
 
+    db = get_database()
+    if timeframe not in TIMEFRAMES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"timeframe must be one of: {', '.join(TIMEFRAMES)}."
+        )
+
+    if format != "json" and format not in STREAM_MEDIA_TYPES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: json, {', '.join(STREAM_MEDIA_TYPES)}."
+        )
+
     if symbolTwo and not symbolOne:
         raise HTTPException(
             status_code=400,
@@ -65,49 +215,65 @@ def get_historical_data(
             detail="symbolOne and symbolTwo must be different."
         )
 
-    query_one = {}
-    if symbolOne:
-        query_one["symbol"] = symbolOne
+    date_from = parse_date_param("from", date_from)
+    date_to = parse_date_param("to", date_to)
+    after = parse_date_param("after", after)
+    after_two = parse_date_param("afterTwo", afterTwo)
+    # An empty range or an exhausted cursor is an empty page, not a missing symbol.
+    ranged = date_from is not None or date_to is not None
 
-    query_two = {}
-    if symbolTwo:
-        query_two["symbol"] = symbolTwo
-
-    projection = {
-        "_id": 0,
-        "pctchg": 1,
-        "avg_price": 1,
-        "date": 1,
-        "last_trade_price": 1,
-        "max": 1,
-        "min": 1,
-        "total_turnover_in_denars": 1,
-        "turnover_in_best_in_denars": 1,
-        "volume": 1,
-        "symbol": 1
-    }
-
-    data = []
+    # Binary formats always carry typed values; only the JSON rows keep the legacy strings in compatibility mode.
+    response_format = format if format in STREAM_MEDIA_TYPES else negotiate_format(request.headers.get("accept"))
+    compat = response_format not in ("arrow", "msgpack") and DATA_ENTRIES_COMPAT_MODE
+
+    # The symbols' data versions change whenever their entries are written, so a matching ETag is answered
+    # without reading any entries.
+    symbols = [symbol for symbol in (symbolOne, symbolTwo) if symbol]
+    versions = get_symbol_versions(db, symbols)
+    etag = make_etag("history", [(symbol, versions[symbol]) for symbol in symbols], timeframe, date_from, date_to,
+                     after, after_two, limit, fill, response_format, compat, batch_size,
+                     preferred_encoding(request.headers.get("accept-encoding")))
+    if matches_if_none_match(request, etag):
+        return not_modified(etag, {"Vary": "Accept, Accept-Encoding"})
+    headers = {"ETag": etag}
+
+    if format in STREAM_MEDIA_TYPES:
+        # A streamed response cannot turn into a 404 halfway, so unknown symbols are checked up front.
+        pages = [(symbolOne, after), (symbolTwo, after_two)]
+        pages = [(symbol, cursor) for symbol, cursor in pages if symbol]
+        for symbol, cursor in pages:
+            if not ranged and cursor is None and latest_entry_date(db, symbol) is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"No historical data found for symbol '{symbol}'."
+                )
+        return stream_rows(stream_history(pages, timeframe, date_from, date_to, limit, fill, batch_size), format,
+                           headers)
+
+    data, next_cursor = [], None
     if symbolOne:
-        data = list(db.data_entries.find(query_one, projection))
-        if not data:
+        data, next_cursor = load_history(symbolOne, timeframe, date_from, date_to, after, limit, fill, compat,
+                                          versions[symbolOne])
+        if not data and not ranged and after is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"No historical data found for symbol '{symbolOne}'."
             )
 
-    data_two = []
+    data_two, next_cursor_two = [], None
     if symbolTwo:
-        data_two = list(db.data_entries.find(query_two, projection))
-        if not data_two:
+        data_two, next_cursor_two = load_history(symbolTwo, timeframe, date_from, date_to, after_two, limit, fill,
+                                                 compat, versions[symbolTwo])
+        if not data_two and not ranged and after_two is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"No historical data found for symbol '{symbolTwo}'."
             )
 
-    response = {
-        "data": data,
-        "dataTwo": data_two
-    }
-
-    return response
\ No newline at end of file
+    return negotiated_response(
+        request,
+        {"next": next_cursor, "nextTwo": next_cursor_two},
+        {"data": data, "dataTwo": data_two},
+        response_format,
+        headers
+    )
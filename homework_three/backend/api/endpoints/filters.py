@@ -1,17 +1,45 @@
-from fastapi import APIRouter
-from backend.app.filters.filter_one.filter_one_main import run_filter_one
-from backend.app.filters.filter_three.filter_three_main import run_filter_three
+from fastapi import APIRouter, HTTPException
+from backend.database.setup_database import get_database
+from backend.app.filters.jobs import job_runner, job_summary, find_job, find_recent_jobs, cancel_job
 
 router = APIRouter()
 
 
-@router.post("/run-filter-one")
-def run_insert_issuers():
-    result_message = run_filter_one()
-    return {"message": result_message}
+def submit_job(kind):
+    job, created = job_runner.submit(kind)
+    message = f"Queued {kind}" if created else f"{kind} is already {job['status']}"
+    return {"message": message, "job_id": job["_id"], "status": job["status"]}
 
 
-@router.post("/run-filter-three")
+@router.post("/run-filter-one", status_code=202)
 def run_insert_issuers():
-    result_message = run_filter_three()
-    return {"message": result_message}
\ No newline at end of file
+    return submit_job("filter-one")
+
+
+@router.post("/run-filter-three", status_code=202)
+def run_scrape_issuers():
+    return submit_job("filter-three")
+
+
+@router.get("/jobs")
+def get_jobs():
+    db = get_database()
+    return [job_summary(job) for job in find_recent_jobs(db)]
+
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    db = get_database()
+    job = find_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job found with id: {job_id}")
+    return job_summary(job)
+
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_pipeline_job(job_id: str):
+    db = get_database()
+    job = cancel_job(db, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job found with id: {job_id}")
+    return job_summary(job)
@@ -1,13 +1,13 @@
 from fastapi import APIRouter, HTTPException
 from typing import List
 from backend.database.setup_database import get_database
+from backend.database.async_database import find_all
+from backend.api.read_cache import cached, cached_async, data_changed
 from pydantic import BaseModel, Field
 import pymongo
 
 router = APIRouter()
 
-db = get_database()
-
 
 class OrderList(BaseModel):
     order_list: List[int] = Field(..., min_length=11, max_length=11)
@@ -24,17 +24,21 @@ class StrategiesOrderList(BaseModel):
 
 @router.get("/get-personalization-order", response_model=List[int])
 def get_personalization_order():
-    document = db.personalization.find_one({"_id": "order"}, {"order_list": 1, "_id": 0})
+    db = get_database()
+    document = cached("personalization-order",
+                      lambda: db.personalization.find_one({"_id": "order"}, {"order_list": 1, "_id": 0}))
     if document and "order_list" in document:
         return document["order_list"]
     else:
         default_order = [1, 2, 3, 4, 11, 5, 6, 7, 8, 9, 10]
         db.personalization.insert_one({"_id": "order", "order_list": default_order})
+        data_changed()
         return default_order
 
 
 @router.post("/update-personalization-order")
 def update_personalization_order(order: OrderList):
+    db = get_database()
     # Validate uniqueness
     if len(set(order.order_list)) != 11:
         raise HTTPException(status_code=400, detail="Order list must contain unique IDs.")
@@ -48,6 +52,7 @@ def update_personalization_order(order: OrderList):
         {"$set": {"order_list": order.order_list}},
         upsert=True
     )
+    data_changed()
 
     if result.modified_count > 0 or result.upserted_id is not None:
         return {"message": "Order updated successfully."}
@@ -56,8 +61,8 @@ def update_personalization_order(order: OrderList):
 
 
 @router.get("/get-personalization-issuers", response_model=List[Issuer])
-def get_personalization_issuers():
-    issuers = list(db.issuers.find({
+async def get_personalization_issuers():
+    issuers = await cached_async("personalization-issuers", lambda: find_all("issuers", {
         "valid": True
     }, {
         "_id": 0,
@@ -69,38 +74,59 @@ def get_personalization_issuers():
 
 @router.post("/update-personalization-issuers", response_model=dict)
 def update_issuers(issuers: List[Issuer]):
+    db = get_database()
     if not issuers:
         raise HTTPException(status_code=400, detail="Issuers list cannot be empty.")
 
-    for issuer in issuers:
-        try:
-            result = db.issuers.update_one(
-                {"symbol": issuer.symbol},
-                {"$set": {"is_watched": issuer.is_watched}},
-                upsert=False
-            )
-            if result.matched_count == 0:
-                raise HTTPException(status_code=404, detail=f"No issuer found with symbol: {issuer.symbol}")
-        except pymongo.errors.OperationFailure as e:
-            raise HTTPException(status_code=500, detail=f"Failed to update issuer {issuer.symbol}: {str(e)}")
+    operations = [
+        pymongo.UpdateOne({"symbol": issuer.symbol}, {"$set": {"is_watched": issuer.is_watched}}, upsert=False)
+        for issuer in issuers
+    ]
+
+    # Every update goes out in one unordered batch. Issuers updated before a failure stay updated, so cached reads
+    # are invalidated either way.
+    try:
+        result = db.issuers.bulk_write(operations, ordered=False)
+    except pymongo.errors.BulkWriteError as e:
+        failures = [
+            f"{issuers[error['index']].symbol}: {error['errmsg']}" for error in e.details["writeErrors"]
+        ]
+        raise HTTPException(status_code=500, detail=f"Failed to update issuers: {'; '.join(failures)}")
+    except pymongo.errors.OperationFailure as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update issuers: {str(e)}")
+    finally:
+        data_changed()
+
+    if result.matched_count < len(operations):
+        # Only a failed match costs a second round trip, to name the unknown symbols.
+        symbols = [issuer.symbol for issuer in issuers]
+        known = set(db.issuers.distinct("symbol", {"symbol": {"$in": symbols}}))
+        unknown = [symbol for symbol in dict.fromkeys(symbols) if symbol not in known]
+        if len(unknown) == 1:
+            raise HTTPException(status_code=404, detail=f"No issuer found with symbol: {unknown[0]}")
+        raise HTTPException(status_code=404, detail=f"No issuers found with symbols: {', '.join(unknown)}")
 
     return {"message": "Issuers updated successfully."}
 
 
 @router.get("/get-personalization-strategies", response_model=List[int])
 def get_personalization_strategies_order():
-    document = db.personalization_strategies.find_one({"_id": "strategies_order"},
-                                                      {"strategies_order_list": 1, "_id": 0})
+    db = get_database()
+    document = cached("personalization-strategies",
+                      lambda: db.personalization_strategies.find_one({"_id": "strategies_order"},
+                                                                     {"strategies_order_list": 1, "_id": 0}))
     if document and "strategies_order_list" in document:
         return document["strategies_order_list"]
     else:
         default_order = [101, 102, 103, 104, 105]
         db.personalization_strategies.insert_one({"_id": "strategies_order", "strategies_order_list": default_order})
+        data_changed()
         return default_order
 
 
 @router.post("/update-personalization-strategies")
 def update_personalization_strategies_order(strategies_order: StrategiesOrderList):
+    db = get_database()
     if len(set(strategies_order.strategies_order_list)) != 5:
         raise HTTPException(status_code=400, detail="Order list must contain unique IDs.")
 
@@ -113,6 +139,7 @@ def update_personalization_strategies_order(strategies_order: StrategiesOrderLis
         {"$set": {"strategies_order_list": strategies_order.strategies_order_list}},
         upsert=True
     )
+    data_changed()
 
     if result.modified_count > 0 or result.upserted_id is not None:
         return {"message": "Order updated successfully."}
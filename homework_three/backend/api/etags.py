@@ -0,0 +1,21 @@
+import hashlib
+from fastapi import Response
+
+
+def make_etag(*parts):
+    # Strong validator over everything that determines the response body: the data versions it was built from and
+    # the parameters, format and encoding of the request.
+    return '"' + hashlib.sha256(repr(parts).encode()).hexdigest()[:32] + '"'
+
+
+def matches_if_none_match(request, etag):
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses the weak comparison, so a W/ prefix on the client's copy is ignored.
+    tags = [tag.strip().removeprefix("W/") for tag in header.split(",")]
+    return "*" in tags or etag in tags
+
+
+def not_modified(etag, headers=None):
+    return Response(status_code=304, headers={"ETag": etag, **(headers or {})})
@@ -0,0 +1,133 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from backend.database.setup_database import get_database
+from backend.database.data_versions import bump_data_version, get_data_version, get_data_version_async
+
+READ_CACHE_ENABLED = os.getenv("READ_CACHE_ENABLED", "1") == "1"
+READ_CACHE_MAX_ENTRIES = int(os.getenv("READ_CACHE_MAX_ENTRIES", "256"))
+READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "300"))
+# How long a data version read from Mongo is trusted before it is read again; 0 checks on every request.
+READ_CACHE_VERSION_CHECK_SECONDS = float(os.getenv("READ_CACHE_VERSION_CHECK_SECONDS", "1"))
+
+
+class ReadCache:
+    # Bounded LRU of endpoint results, keyed by endpoint name and parameters. An entry is served while it is younger
+    # than the TTL and was built from the current data version, so writes are visible at the next version check.
+    def __init__(self, version_loader, max_entries=READ_CACHE_MAX_ENTRIES, ttl=READ_CACHE_TTL_SECONDS,
+                 version_check_interval=READ_CACHE_VERSION_CHECK_SECONDS, enabled=READ_CACHE_ENABLED):
+        self.version_loader = version_loader
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.version_check_interval = version_check_interval
+        self.enabled = enabled
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.version = None
+        self.version_checked_at = 0.0
+        self.counters = {"hits": 0, "misses": 0, "expired": 0, "invalidated": 0, "evicted": 0}
+
+    def version_due(self):
+        return self.version is None or time.monotonic() - self.version_checked_at >= self.version_check_interval
+
+    def set_version(self, version):
+        with self.lock:
+            if version != self.version and self.version is not None:
+                self.counters["invalidated"] += len(self.entries)
+                self.entries.clear()
+            self.version = version
+            self.version_checked_at = time.monotonic()
+
+    def current_version(self):
+        if self.version_due():
+            self.set_version(self.version_loader())
+        return self.version
+
+    def lookup(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                entry_version, expires_at, value = entry
+                if entry_version == version and expires_at > time.monotonic():
+                    self.entries.move_to_end(key)
+                    self.counters["hits"] += 1
+                    return True, value
+                self.counters["expired"] += 1
+                del self.entries[key]
+            self.counters["misses"] += 1
+        return False, None
+
+    def store(self, key, version, value):
+        with self.lock:
+            self.entries[key] = (version, time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.counters["evicted"] += 1
+
+    def get_or_load(self, key, loader, version=None):
+        # A version passed in, such as the one an ETag was built from, tags the entry instead of the global data
+        # version, so the body served is never older than the version its ETag names.
+        if not self.enabled:
+            return loader()
+
+        if version is None:
+            version = self.current_version()
+        hit, value = self.lookup(key, version)
+        if not hit:
+            value = loader()
+            self.store(key, version, value)
+        return value
+
+    async def get_or_load_async(self, key, loader, version_loader, version=None):
+        # Same as get_or_load for coroutine loaders, so async endpoints never block on the version check either.
+        if not self.enabled:
+            return await loader()
+
+        if version is None:
+            if self.version_due():
+                self.set_version(await version_loader())
+            version = self.version
+        hit, value = self.lookup(key, version)
+        if not hit:
+            value = await loader()
+            self.store(key, version, value)
+        return value
+
+    def invalidate(self):
+        with self.lock:
+            self.counters["invalidated"] += len(self.entries)
+            self.entries.clear()
+            self.version = None
+
+    def stats(self):
+        with self.lock:
+            lookups = self.counters["hits"] + self.counters["misses"]
+            return {
+                **self.counters,
+                "hit_rate": round(self.counters["hits"] / lookups, 4) if lookups else None,
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "data_version": self.version,
+                "enabled": self.enabled
+            }
+
+
+read_cache = ReadCache(lambda: get_data_version(get_database()))
+
+
+def cached(name, loader, *params, version=None):
+    return read_cache.get_or_load((name, *params), loader, version)
+
+
+async def cached_async(name, loader, *params, version=None):
+    return await read_cache.get_or_load_async((name, *params), loader, get_data_version_async, version)
+
+
+def data_changed():
+    # Called by API handlers that write: other API processes see the new version at their next check, this one
+    # drops its entries right away so the writer reads its own changes.
+    bump_data_version(get_database())
+    read_cache.invalidate()
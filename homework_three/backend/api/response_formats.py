@@ -0,0 +1,187 @@
+import csv
+import gzip
+import io
+import json
+import os
+from datetime import date, timedelta
+import brotli
+import msgpack
+import pyarrow as pa
+from fastapi.responses import Response, StreamingResponse
+from backend.database.entry_format import parse_entry_date
+from backend.database.price_storage import ENTRY_FIELDS
+from backend.app.analytics.series import fill_entries
+
+# Rows per Mongo cursor batch and per streamed chunk. Larger batches mean fewer round trips, smaller ones a lower
+# and flatter memory footprint per request.
+HISTORY_STREAM_BATCH_SIZE = int(os.getenv("HISTORY_STREAM_BATCH_SIZE", "1000"))
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv"
+}
+
+# Formats picked through the Accept header, in order of preference when the client rates several of them equally.
+NEGOTIATED_MEDIA_TYPES = {
+    "json": ["application/json"],
+    "msgpack": ["application/msgpack", "application/x-msgpack", "application/vnd.msgpack"],
+    "arrow": ["application/vnd.apache.arrow.stream"]
+}
+
+# JSON bodies smaller than this are sent uncompressed.
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+
+
+def batched(entries, size):
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def fill_batches(symbol, batches, seed=None, start=None):
+    # Forward fills a stream one batch at a time. The last stored entry of each batch seeds the next one, so the
+    # filled stream is the same as filling the whole history at once.
+    carry = seed or []
+    for batch in batches:
+        filled = fill_entries(symbol, carry + batch, start=start)
+        carry = [batch[-1]]
+        start = parse_entry_date(batch[-1]["date"]) + timedelta(days=1)
+        yield filled
+
+
+def ndjson_chunks(row_batches):
+    for rows in row_batches:
+        yield "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+
+
+def csv_chunks(row_batches):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=ENTRY_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for rows in row_batches:
+        writer.writerows(rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def stream_rows(row_batches, response_format, headers=None):
+    chunks = ndjson_chunks(row_batches) if response_format == "ndjson" else csv_chunks(row_batches)
+    return StreamingResponse(chunks, media_type=STREAM_MEDIA_TYPES[response_format], headers=headers)
+
+
+def parse_header_qualities(header):
+    # Splits an Accept or Accept-Encoding header into {value: quality}.
+    qualities = {}
+    for part in (header or "").split(","):
+        value, *params = [piece.strip() for piece in part.split(";")]
+        if not value:
+            continue
+        quality = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    quality = float(number)
+                except ValueError:
+                    quality = 0.0
+        qualities[value.lower()] = max(quality, qualities.get(value.lower(), 0.0))
+    return qualities
+
+
+def media_type_quality(qualities, media_type):
+    main_type = media_type.split("/")[0]
+    for candidate in (media_type, f"{main_type}/*", "*/*"):
+        if candidate in qualities:
+            return qualities[candidate]
+    return 0.0
+
+
+def negotiate_format(accept):
+    # JSON wins ties and is the fallback when nothing acceptable is on offer, so browsers sending */* keep it.
+    qualities = parse_header_qualities(accept)
+    best_format, best_quality = "json", 0.0
+    for response_format, media_types in NEGOTIATED_MEDIA_TYPES.items():
+        quality = max(media_type_quality(qualities, media_type) for media_type in media_types)
+        if quality > best_quality:
+            best_format, best_quality = response_format, quality
+    return best_format
+
+
+def to_columns(rows):
+    columns = {}
+    for index, row in enumerate(rows):
+        for name, value in row.items():
+            columns.setdefault(name, [None] * index).append(value)
+        for name, values in columns.items():
+            if len(values) <= index:
+                values.append(None)
+    return columns
+
+
+def arrow_column(name, values):
+    if name == "date":
+        return pa.array([date.fromisoformat(value) if value else None for value in values], pa.date32())
+    return pa.array(values)
+
+
+def encode_arrow(metadata, tables):
+    # One IPC stream holding the rows of every table one after the other, each row tagged with its table's name.
+    # The remaining response fields travel as JSON in the schema metadata.
+    columns = to_columns([{"table": name, **row} for name, rows in tables.items() for row in rows])
+    table = pa.table({name: arrow_column(name, values) for name, values in columns.items()})
+    table = table.replace_schema_metadata({"metadata": json.dumps(metadata)})
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode_msgpack(metadata, tables):
+    return msgpack.packb({**metadata, **{name: to_columns(rows) for name, rows in tables.items()}})
+
+
+def preferred_encoding(accept_encoding):
+    encodings = parse_header_qualities(accept_encoding)
+    if encodings.get("br", 0) > 0:
+        return "br"
+    if encodings.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress_json(body, accept_encoding):
+    encoding = preferred_encoding(accept_encoding)
+    if len(body) < COMPRESSION_MIN_BYTES or encoding is None:
+        return body, None
+    if encoding == "br":
+        return brotli.compress(body, quality=5), encoding
+    return gzip.compress(body, compresslevel=6), encoding
+
+
+def negotiated_response(request, metadata, tables, response_format=None, headers=None):
+    # Sends the tables (lists of row dicts) with the other response fields as Arrow IPC, columnar MessagePack or
+    # plain row-oriented JSON, according to the request's Accept header.
+    response_format = response_format or negotiate_format(request.headers.get("accept"))
+    headers = {"Vary": "Accept, Accept-Encoding", **(headers or {})}
+
+    if response_format == "arrow":
+        return Response(encode_arrow(metadata, tables), media_type=NEGOTIATED_MEDIA_TYPES["arrow"][0],
+                        headers=headers)
+    if response_format == "msgpack":
+        return Response(encode_msgpack(metadata, tables), media_type=NEGOTIATED_MEDIA_TYPES["msgpack"][0],
+                        headers=headers)
+
+    body = json.dumps({**metadata, **tables}, separators=(",", ":")).encode()
+    body, encoding = compress_json(body, request.headers.get("accept-encoding"))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+    return Response(body, media_type="application/json", headers=headers)
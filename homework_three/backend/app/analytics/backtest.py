@@ -0,0 +1,160 @@
+import numpy as np
+from backend.app.analytics.indicators import rolling_windows, rsi, sma, willr
+
+SELL = -1
+HOLD = 0
+BUY = 1
+
+
+def signals_from_thresholds(buy, sell):
+    actions = np.full(len(buy), HOLD, dtype=np.int8)
+    actions[buy] = BUY
+    actions[sell] = SELL
+    return actions
+
+
+def rsi2_actions(frame, params):
+    values = rsi(frame["last_trade_price"], params["period"])
+    with np.errstate(invalid="ignore"):
+        return signals_from_thresholds(values < 10, values > 90)
+
+
+def bbands_actions(frame, params):
+    closings = frame["last_trade_price"]
+    period = params["period"]
+    middle = sma(closings, period)
+
+    deviation = np.full(len(closings), np.nan)
+    if len(closings) >= period:
+        deviation[period - 1:] = rolling_windows(closings, period).std(axis=1)
+
+    upper = middle + params.get("stdDev", 2) * deviation
+    lower = middle - params.get("stdDev", 2) * deviation
+    with np.errstate(invalid="ignore"):
+        return signals_from_thresholds(closings < lower, closings > upper)
+
+
+def willr_actions(frame, params):
+    values = willr(frame["max"], frame["min"], frame["last_trade_price"], params["period"])
+    with np.errstate(invalid="ignore"):
+        return signals_from_thresholds(values <= -80, values >= -20)
+
+
+def vwma_actions(frame, params):
+    closings = frame["last_trade_price"]
+    volumes = frame["volume"]
+    period = params["period"]
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        vwma = sma(closings * volumes, period) / sma(volumes, period)
+    average = sma(closings, period)
+    with np.errstate(invalid="ignore"):
+        return signals_from_thresholds(vwma > average, vwma < average)
+
+
+def psar_actions(frame, params):
+    # Parabolic SAR is path dependent (each stop depends on the previous trend, extreme point and acceleration),
+    # so it is the one strategy computed with a loop rather than array operations.
+    highs = frame["max"]
+    lows = frame["min"]
+    actions = np.full(len(highs), HOLD, dtype=np.int8)
+    if len(highs) < 2:
+        return actions
+
+    step = params["step"]
+    maximum = params["max"]
+
+    rising = True
+    acceleration = step
+    extreme = highs[0]
+    stop = lows[0]
+
+    for index in range(1, len(highs)):
+        stop = stop + acceleration * (extreme - stop)
+        if rising:
+            stop = min(stop, lows[index - 1], lows[max(index - 2, 0)])
+            if lows[index] < stop:
+                rising = False
+                stop = extreme
+                extreme = lows[index]
+                acceleration = step
+            elif highs[index] > extreme:
+                extreme = highs[index]
+                acceleration = min(acceleration + step, maximum)
+        else:
+            stop = max(stop, highs[index - 1], highs[max(index - 2, 0)])
+            if highs[index] > stop:
+                rising = True
+                stop = extreme
+                extreme = highs[index]
+                acceleration = step
+            elif lows[index] < extreme:
+                extreme = lows[index]
+                acceleration = min(acceleration + step, maximum)
+
+        actions[index] = BUY if rising else SELL
+
+    return actions
+
+
+STRATEGIES = {
+    "RSI2": rsi2_actions,
+    "BBANDS": bbands_actions,
+    "WILLR": willr_actions,
+    "VWMA": vwma_actions,
+    "PSAR": psar_actions,
+}
+
+
+def positions_from_actions(actions):
+    # Long-only: a BUY opens a position, a SELL closes it, HOLD keeps the previous state.
+    signalled = np.flatnonzero(actions != HOLD)
+    last_signal = np.full(len(actions), -1)
+    last_signal[signalled] = signalled
+    last_signal = np.maximum.accumulate(last_signal)
+
+    positions = np.zeros(len(actions), dtype=np.int8)
+    has_signal = last_signal >= 0
+    positions[has_signal] = actions[last_signal[has_signal]] == BUY
+    return positions
+
+
+def performance(closings, actions):
+    positions = positions_from_actions(actions)
+
+    returns = np.zeros(len(closings))
+    if len(closings) > 1:
+        previous = closings[:-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            changes = np.where(previous > 0, closings[1:] / previous - 1, 0.0)
+        # A position taken at a day's close earns the next day's change.
+        returns[1:] = positions[:-1] * changes
+
+    equity = np.cumprod(1 + returns)
+    drawdowns = equity / np.maximum.accumulate(equity) - 1 if len(equity) else equity
+
+    transitions = np.diff(np.r_[0, positions])
+    entries = np.flatnonzero(transitions == 1)
+    exits = np.flatnonzero(transitions == -1)
+    closed = entries[:len(exits)]
+    wins = int(np.sum(closings[exits] > closings[closed]))
+
+    buy_and_hold = 0.0
+    priced = np.flatnonzero(closings > 0)
+    if len(priced):
+        buy_and_hold = float(closings[priced[-1]] / closings[priced[0]] - 1)
+
+    return {
+        "total_return": float(equity[-1] - 1) if len(equity) else 0.0,
+        "buy_and_hold_return": buy_and_hold,
+        "max_drawdown": float(drawdowns.min()) if len(drawdowns) else 0.0,
+        "trades": int(len(entries)),
+        "closed_trades": int(len(exits)),
+        "hit_rate": wins / len(exits) if len(exits) else None,
+        "exposure": float(positions.mean()) if len(positions) else 0.0
+    }
+
+
+def run_backtest(strategy_name, frame, params):
+    actions = STRATEGIES[strategy_name](frame, params)
+    return actions, performance(frame["last_trade_price"], actions)
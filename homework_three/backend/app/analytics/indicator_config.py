@@ -0,0 +1,62 @@
+# Mirrors frontend/src/indicatorConfig.ts so server-side results use the same parameters as the charts.
+INDICATOR_CONFIG = {
+    "SMA": {
+        "day": {"period": 10},
+        "week": {"period": 50},
+        "month": {"period": 20},
+    },
+    "EMA": {
+        "day": {"period": 12},
+        "week": {"period": 60},
+        "month": {"period": 24},
+    },
+    "RMA": {
+        "day": {"period": 10},
+        "week": {"period": 50},
+        "month": {"period": 20},
+    },
+    "DEMA": {
+        "day": {"period": 10},
+        "week": {"period": 50},
+        "month": {"period": 20},
+    },
+    "TRIMA": {
+        "day": {"period": 10},
+        "week": {"period": 50},
+        "month": {"period": 20},
+    },
+    "RSI": {
+        "day": {"period": 14},
+        "week": {"period": 70},
+        "month": {"period": 28},
+    },
+    "TRIX": {
+        "day": {"period": 1},
+        "week": {"period": 1},
+        "month": {"period": 1},
+    },
+    "STOCH": {
+        "day": {"kPeriod": 14, "dPeriod": 3},
+        "week": {"kPeriod": 70, "dPeriod": 3},
+        "month": {"kPeriod": 28, "dPeriod": 3},
+    },
+    "CCI": {
+        "day": {"period": 14},
+        "week": {"period": 70},
+        "month": {"period": 28},
+    },
+    "WILLR": {
+        "day": {"period": 14},
+        "week": {"period": 70},
+        "month": {"period": 28},
+    },
+}
+
+TIMEFRAMES = ("day", "week", "month")
+
+
+def get_indicator_params(indicator_name, timeframe):
+    config = INDICATOR_CONFIG.get(indicator_name)
+    if not config:
+        return None
+    return config.get(timeframe)
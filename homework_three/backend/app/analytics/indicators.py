@@ -0,0 +1,200 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+SMOOTHING_BLOCK = 128
+
+
+def rolling_windows(values, period):
+    return sliding_window_view(values, period)
+
+
+def align(values, period):
+    # Pads a full-window result with NaN so it lines up with the input; the first period - 1 rows have no value.
+    result = np.full(len(values) + period - 1, np.nan)
+    result[period - 1:] = values
+    return result
+
+
+def sma(values, period):
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    cumulative = np.cumsum(np.r_[0.0, values])
+    return align((cumulative[period:] - cumulative[:-period]) / period, period)
+
+
+def rolling_max(values, period):
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    return align(rolling_windows(values, period).max(axis=1), period)
+
+
+def rolling_min(values, period):
+    if len(values) < period:
+        return np.full(len(values), np.nan)
+    return align(rolling_windows(values, period).min(axis=1), period)
+
+
+def smooth(values, alpha, start=0):
+    # Vectorized y[i] = alpha * x[i] + (1 - alpha) * y[i - 1], seeded with y[start] = x[start]. The closed form is
+    # evaluated block by block so the decay powers stay within floating point range on long histories.
+    result = np.full(len(values), np.nan)
+    if len(values) <= start:
+        return result
+
+    decay = 1.0 - alpha
+    if decay <= 0:
+        result[start:] = values[start:]
+        return result
+
+    # Keeps decay ** block_size around 1e-250 at the smallest when the decay is small.
+    block_size = min(SMOOTHING_BLOCK, max(1, int(250 / -np.log10(decay))))
+    previous = values[start]
+    result[start] = previous
+
+    position = start + 1
+    while position < len(values):
+        block = values[position:position + block_size]
+        steps = np.arange(1, len(block) + 1)
+        powers = decay ** steps
+        weighted = np.cumsum(alpha * block / powers)
+        result[position:position + len(block)] = powers * (previous + weighted)
+        previous = result[position + len(block) - 1]
+        position += len(block)
+
+    return result
+
+
+def ema(values, period):
+    return smooth(values, 2.0 / (period + 1))
+
+
+def rma(values, period):
+    # Wilder's moving average: seeded with the simple average of the first period values.
+    result = np.full(len(values), np.nan)
+    if len(values) < period:
+        return result
+
+    seeded = values.astype(float)
+    seeded[period - 1] = values[:period].mean()
+    result[period - 1:] = smooth(seeded, 1.0 / period, start=period - 1)[period - 1:]
+    return result
+
+
+def dema(values, period):
+    first = ema(values, period)
+    return 2 * first - ema(first, period)
+
+
+def trima(values, period):
+    if period % 2 == 0:
+        inner = period // 2
+        outer = inner + 1
+    else:
+        inner = (period + 1) // 2
+        outer = inner
+
+    first = sma(values, outer)
+    valid = ~np.isnan(first)
+    result = np.full(len(values), np.nan)
+    if valid.any():
+        offset = np.argmax(valid)
+        result[offset:] = sma(first[offset:], inner)
+    return result
+
+
+def rsi(closings, period):
+    changes = np.diff(closings, prepend=closings[:1])
+    gains = rma(np.clip(changes, 0, None), period)
+    losses = rma(np.clip(-changes, 0, None), period)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = 100 - 100 / (1 + gains / losses)
+    result[(losses == 0) & ~np.isnan(gains)] = 100
+    result[(losses == 0) & (gains == 0)] = 50
+    return result
+
+
+def trix(closings, period):
+    triple = ema(ema(ema(closings, period), period), period)
+    result = np.full(len(closings), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result[1:] = (triple[1:] - triple[:-1]) / triple[:-1] * 100
+    return result
+
+
+def stoch(highs, lows, closings, k_period, d_period):
+    highest = rolling_max(highs, k_period)
+    lowest = rolling_min(lows, k_period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        k = (closings - lowest) / (highest - lowest) * 100
+
+    d = np.full(len(closings), np.nan)
+    valid = ~np.isnan(k)
+    if valid.any():
+        offset = np.argmax(valid)
+        d[offset:] = sma(k[offset:], d_period)
+    return k, d
+
+
+def cci(highs, lows, closings, period):
+    typical = (highs + lows + closings) / 3
+    average = sma(typical, period)
+
+    deviation = np.full(len(typical), np.nan)
+    if len(typical) >= period:
+        windows = rolling_windows(typical, period)
+        deviation[period - 1:] = np.abs(windows - windows.mean(axis=1, keepdims=True)).mean(axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (typical - average) / (0.015 * deviation)
+
+
+def willr(highs, lows, closings, period):
+    highest = rolling_max(highs, period)
+    lowest = rolling_min(lows, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return (highest - closings) / (highest - lowest) * -100
+
+
+def calculate_indicator(indicator_name, frame, params):
+    closings = frame["last_trade_price"]
+    highs = frame["max"]
+    lows = frame["min"]
+
+    if indicator_name == "SMA":
+        return {"value": sma(closings, params["period"])}
+    if indicator_name == "EMA":
+        return {"value": ema(closings, params["period"])}
+    if indicator_name == "RMA":
+        return {"value": rma(closings, params["period"])}
+    if indicator_name == "DEMA":
+        return {"value": dema(closings, params["period"])}
+    if indicator_name == "TRIMA":
+        return {"value": trima(closings, params["period"])}
+    if indicator_name == "RSI":
+        return {"value": rsi(closings, params["period"])}
+    if indicator_name == "TRIX":
+        return {"value": trix(closings, params["period"])}
+    if indicator_name == "STOCH":
+        k, d = stoch(highs, lows, closings, params["kPeriod"], params["dPeriod"])
+        return {"value": k, "signal": d}
+    if indicator_name == "CCI":
+        return {"value": cci(highs, lows, closings, params["period"])}
+    if indicator_name == "WILLR":
+        return {"value": willr(highs, lows, closings, params["period"])}
+
+    raise ValueError(f"Indicator {indicator_name} is not recognized.")
+
+
+def to_series(dates, values):
+    # Builds [{"date": ..., "value": ...}] rows, with NaN and infinite values reported as null.
+    columns = {}
+    for name, column in values.items():
+        column = column.astype(object)
+        column[~np.isfinite(values[name])] = None
+        columns[name] = column.tolist()
+
+    return [
+        {"date": date, **{name: column[index] for name, column in columns.items()}}
+        for index, date in enumerate(dates)
+    ]
@@ -0,0 +1,64 @@
+from datetime import timedelta
+import numpy as np
+import pymongo
+from backend.database.entry_format import parse_entry_date
+from backend.database.price_storage import PERIOD_COLLECTIONS, find_entries, latest_entry_date, stored_symbols
+from backend.app.analytics.series import frame_from_entries, frame_entries, forward_fill_calendar, aggregate_frame
+
+
+def period_start(date, timeframe):
+    date = parse_entry_date(date).replace(hour=0, minute=0, second=0, microsecond=0)
+    if timeframe == "week":
+        return date - timedelta(days=date.weekday())
+    return date.replace(day=1)
+
+
+def bar_documents(symbol, bars, timeframe):
+    for entry in frame_entries(symbol, bars):
+        start = period_start(entry["date"], timeframe)
+        yield {"_id": f"{symbol}:{start:%Y-%m-%d}", "period_start": start, **entry}
+
+
+def refresh_period_aggregates(db, symbol, since=None):
+    # Recomputes the weekly and monthly bars of every period from the one containing `since` onwards. Bars are
+    # built from the forward-filled daily series like the frontend's aggregation, so the daily series is loaded
+    # from the last entry before the first affected period, which is what the period's first days carry over.
+    starts = {}
+    if since is not None:
+        starts = {timeframe: period_start(since, timeframe) for timeframe in PERIOD_COLLECTIONS}
+        earliest = min(starts.values())
+        carried_date = latest_entry_date(db, symbol, before=earliest)
+        entries = find_entries(db, symbol, date_from=carried_date or earliest)
+    else:
+        entries = find_entries(db, symbol)
+
+    daily = forward_fill_calendar(frame_from_entries(entries))
+
+    for timeframe, collection in PERIOD_COLLECTIONS.items():
+        frame = daily
+        if timeframe in starts:
+            keep = daily["date"] >= np.datetime64(starts[timeframe].date())
+            frame = {column: values[keep] for column, values in daily.items()}
+        else:
+            db[collection].delete_many({"symbol": symbol})
+
+        if len(frame["date"]) == 0:
+            continue
+
+        bars = aggregate_frame(frame, timeframe)
+        db[collection].bulk_write([
+            pymongo.ReplaceOne({"_id": document["_id"]}, document, upsert=True)
+            for document in bar_documents(symbol, bars, timeframe)
+        ], ordered=False)
+
+
+def rebuild_period_aggregates(db, symbols=None):
+    symbols = symbols if symbols is not None else stored_symbols(db)
+    for symbol in symbols:
+        refresh_period_aggregates(db, symbol)
+    print(f"Rebuilt weekly and monthly aggregates for {len(symbols)} symbols.")
+
+
+def ensure_period_aggregates(db):
+    if any(db[collection].estimated_document_count() == 0 for collection in PERIOD_COLLECTIONS.values()):
+        rebuild_period_aggregates(db)
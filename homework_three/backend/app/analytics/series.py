@@ -0,0 +1,112 @@
+import numpy as np
+from bson.int64 import Int64
+from backend.database.entry_format import NUMERIC_COLUMNS, INTEGER_COLUMNS, to_typed_entry
+from backend.database.price_storage import find_entries, find_entries_for_symbols, find_period_bars
+
+
+def empty_frame():
+    frame = {"date": np.array([], dtype="datetime64[D]")}
+    for column in NUMERIC_COLUMNS:
+        frame[column] = np.array([], dtype=float)
+    return frame
+
+
+def frame_from_entries(entries):
+    entries = sorted((to_typed_entry(entry) for entry in entries), key=lambda entry: entry["date"])
+    if not entries:
+        return empty_frame()
+
+    frame = {"date": np.array([entry["date"] for entry in entries], dtype="datetime64[D]")}
+    for column in NUMERIC_COLUMNS:
+        values = np.array([entry.get(column) for entry in entries], dtype=float)
+        # Missing values count as zero, the same as parseNumber in the frontend.
+        frame[column] = np.nan_to_num(values, nan=0.0)
+    return frame
+
+
+def load_daily_frame(db, symbol):
+    return frame_from_entries(find_entries(db, symbol))
+
+
+def forward_fill_calendar(frame):
+    # Server-side equivalent of processData in dataCleaning.ts: one row per calendar day between the first and
+    # last entry, with days without trading carrying the previous day's values.
+    if len(frame["date"]) == 0:
+        return frame
+
+    calendar = np.arange(frame["date"][0], frame["date"][-1] + np.timedelta64(1, "D"), dtype="datetime64[D]")
+    source_rows = np.searchsorted(frame["date"], calendar, side="right") - 1
+
+    filled = {"date": calendar}
+    for column in NUMERIC_COLUMNS:
+        filled[column] = frame[column][source_rows]
+    return filled
+
+
+def frame_entries(symbol, frame):
+    for index, date in enumerate(frame["date"].astype("datetime64[ms]").astype(object)):
+        entry = {"date": date, "symbol": symbol}
+        for column in NUMERIC_COLUMNS:
+            value = frame[column][index].item()
+            entry[column] = Int64(round(value)) if column in INTEGER_COLUMNS else value
+        yield entry
+
+
+def fill_entries(symbol, entries, start=None):
+    # Forward fills a date-ordered run of entries over every calendar day. The run may begin with a seed entry from
+    # before `start`, whose values then carry over into the first days; days before `start` are dropped.
+    filled = forward_fill_calendar(frame_from_entries(entries))
+    if start is not None:
+        keep = filled["date"] >= np.datetime64(start.date())
+        filled = {column: values[keep] for column, values in filled.items()}
+    return list(frame_entries(symbol, filled))
+
+
+def period_starts(dates, timeframe):
+    if timeframe == "week":
+        # datetime64 day 0 is a Thursday; shifting by three days makes periods start on Mondays.
+        keys = (dates.astype("int64") + 3) // 7
+    elif timeframe == "month":
+        keys = dates.astype("datetime64[M]").astype("int64")
+    else:
+        raise ValueError(f"Unknown timeframe: {timeframe}")
+
+    return np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+
+
+def aggregate_frame(frame, timeframe):
+    # Same bars as aggregateWeekly/aggregateMonthly in dataAggregation.ts: the period's highest max, lowest min,
+    # last closing price and total volume, dated on the period's last day. Other columns come from the first day.
+    if timeframe == "day" or len(frame["date"]) == 0:
+        return frame
+
+    starts = period_starts(frame["date"], timeframe)
+    ends = np.r_[starts[1:], len(frame["date"])] - 1
+
+    aggregated = {column: frame[column][starts] for column in NUMERIC_COLUMNS}
+    aggregated["date"] = frame["date"][ends]
+    aggregated["max"] = np.maximum.reduceat(frame["max"], starts)
+    aggregated["min"] = np.minimum.reduceat(frame["min"], starts)
+    aggregated["last_trade_price"] = frame["last_trade_price"][ends]
+    aggregated["volume"] = np.add.reduceat(frame["volume"], starts)
+    return aggregated
+
+
+def load_frame(db, symbol, timeframe="day"):
+    if timeframe != "day":
+        # Weekly and monthly bars are materialized by the pipeline.
+        return frame_from_entries(find_period_bars(db, symbol, timeframe))
+    return forward_fill_calendar(load_daily_frame(db, symbol))
+
+
+def load_frames(db, symbols, timeframe="day"):
+    if timeframe != "day":
+        return {symbol: load_frame(db, symbol, timeframe) for symbol in symbols}
+    return {
+        symbol: forward_fill_calendar(frame_from_entries(entries))
+        for symbol, entries in find_entries_for_symbols(db, symbols).items()
+    }
+
+
+def format_dates(dates):
+    return np.datetime_as_string(dates, unit="D").tolist()
@@ -0,0 +1,35 @@
+# Mirrors frontend/src/strategyConfig.ts so backtests use the same parameters as the reports page.
+STRATEGY_CONFIG = {
+    "RSI2": {
+        "day": {"period": 14},
+        "week": {"period": 70},
+        "month": {"period": 28},
+    },
+    "WILLR": {
+        "day": {"period": 14},
+        "week": {"period": 70},
+        "month": {"period": 28},
+    },
+    "PSAR": {
+        "day": {"step": 0.02, "max": 0.2},
+        "week": {"step": 0.02, "max": 0.2},
+        "month": {"step": 0.02, "max": 0.2},
+    },
+    "BBANDS": {
+        "day": {"period": 20, "stdDev": 2},
+        "week": {"period": 50, "stdDev": 2},
+        "month": {"period": 20, "stdDev": 2},
+    },
+    "VWMA": {
+        "day": {"period": 20},
+        "week": {"period": 50},
+        "month": {"period": 20},
+    },
+}
+
+
+def get_strategy_params(strategy_name, timeframe):
+    config = STRATEGY_CONFIG.get(strategy_name)
+    if not config:
+        return None
+    return config.get(timeframe)
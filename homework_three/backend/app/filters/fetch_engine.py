@@ -0,0 +1,103 @@
+import asyncio
+import os
+import random
+from urllib.parse import urlparse
+
+import aiohttp
+from backend.app.filters.response_cache import response_cache
+
+# Every scraped URL is built on this, so the scraper can be pointed at a local replay server (see backend/benchmarks).
+MSE_BASE_URL = os.getenv("SCRAPER_BASE_URL", "https://www.mse.mk").rstrip("/")
+
+MAX_CONNECTIONS = int(os.getenv("SCRAPER_MAX_CONNECTIONS", "32"))
+MAX_CONNECTIONS_PER_HOST = int(os.getenv("SCRAPER_MAX_CONNECTIONS_PER_HOST", "8"))
+MAX_RETRIES = int(os.getenv("SCRAPER_MAX_RETRIES", "4"))
+BACKOFF_BASE_SECONDS = float(os.getenv("SCRAPER_BACKOFF_BASE_SECONDS", "0.5"))
+BACKOFF_MAX_SECONDS = float(os.getenv("SCRAPER_BACKOFF_MAX_SECONDS", "10"))
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("SCRAPER_REQUEST_TIMEOUT_SECONDS", "60"))
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class FetchError(Exception):
+    pass
+
+
+class FetchEngine:
+    def __init__(self,
+                 max_connections=MAX_CONNECTIONS,
+                 max_connections_per_host=MAX_CONNECTIONS_PER_HOST,
+                 max_retries=MAX_RETRIES,
+                 backoff_base=BACKOFF_BASE_SECONDS,
+                 backoff_max=BACKOFF_MAX_SECONDS,
+                 timeout=REQUEST_TIMEOUT_SECONDS,
+                 cache=response_cache):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max_connections_per_host
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.timeout = timeout
+        self.cache = cache
+        self.session = None
+        self.global_semaphore = None
+        self.host_semaphores = {}
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(
+            limit=self.max_connections,
+            limit_per_host=self.max_connections_per_host
+        )
+        self.session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        )
+        self.global_semaphore = asyncio.Semaphore(self.max_connections)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.session.close()
+        self.session = None
+
+    def host_semaphore(self, url):
+        host = urlparse(url).netloc
+        if host not in self.host_semaphores:
+            self.host_semaphores[host] = asyncio.Semaphore(self.max_connections_per_host)
+        return self.host_semaphores[host]
+
+    def backoff_delay(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    async def fetch(self, url, before_request=None):
+        # `before_request` is awaited once a connection slot is free, right before each request goes out, so a
+        # cancelled job stops fetching even when its requests were queued up behind the semaphores.
+        page, entry = self.cache.fresh_page(url)
+        if page:
+            return page
+
+        headers = self.cache.conditional_headers(entry)
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self.global_semaphore, self.host_semaphore(url):
+                    if before_request is not None:
+                        await before_request()
+                    async with self.session.get(url, headers=headers) as response:
+                        if response.status in RETRY_STATUSES:
+                            last_error = FetchError(f"HTTP {response.status} for {url}")
+                        elif response.status == 304 and entry:
+                            return self.cache.revalidated(entry, response.headers)
+                        else:
+                            response.raise_for_status()
+                            return self.cache.store(url, await response.read(), response.headers)
+            except aiohttp.ClientResponseError as e:
+                raise FetchError(f"HTTP {e.status} for {url}") from e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                last_error = FetchError(f"Request to {url} failed: {e!r}")
+
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.backoff_delay(attempt))
+
+        raise last_error
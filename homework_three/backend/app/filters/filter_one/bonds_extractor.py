@@ -1,46 +1,94 @@
-import requests
+import asyncio
+import pymongo
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
+from backend.app.filters.fetch_engine import MSE_BASE_URL, FetchEngine
+from backend.app.filters.response_cache import fetch_cached
+from backend.database.setup_database import get_database
 
-BASE_URL = 'https://www.mse.mk/'
-BONDS_LIST_URL = 'https://www.mse.mk/en/issuers/bonds'
+BASE_URL = f'{MSE_BASE_URL}/'
+BONDS_LIST_URL = f'{MSE_BASE_URL}/en/issuers/bonds'
 
+BONDS_TABLE_NAMESPACE = "bonds-table"
+BOND_SYMBOL_NAMESPACE = "bond-symbol"
 
-def get_bond_symbols():
-    response = requests.get(BONDS_LIST_URL)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
+
+def get_bond_urls():
+    page = fetch_cached(BONDS_LIST_URL)
+    return page.cache.parse(BONDS_TABLE_NAMESPACE, page, parse_bond_urls)
+
+
+def parse_bond_urls(content):
+    soup = BeautifulSoup(content, 'html.parser')
     bond_table = soup.find('table', {'id': 'bonds-table'})
 
     if bond_table is None:
+        return None
+
+    bond_urls = []
+    for row in bond_table.find_all('tr')[1:]:
+        cells = row.find_all('td')
+        if len(cells) > 1:
+            link_tag = cells[1].find('a')
+            if link_tag and 'href' in link_tag.attrs:
+                bond_url = urljoin(BASE_URL, link_tag['href'])
+                bond_urls.append(bond_url)
+
+    return bond_urls
+
+
+def parse_bond_symbol(content):
+    bond_soup = BeautifulSoup(content, 'html.parser')
+
+    historical_data_link = bond_soup.find('a', string="Historical Data")
+    if historical_data_link and 'href' in historical_data_link.attrs:
+        path = urlparse(historical_data_link['href']).path
+        return path.split('/')[-1]
+
+    return None
+
+
+async def resolve_bond_symbols(bond_urls):
+    async with FetchEngine() as engine:
+        pages = await asyncio.gather(*(engine.fetch(bond_url) for bond_url in bond_urls))
+    return {
+        bond_url: page.cache.parse(BOND_SYMBOL_NAMESPACE, page, parse_bond_symbol)
+        for bond_url, page in zip(bond_urls, pages)
+    }
+
+
+def get_bond_symbols():
+    bond_urls = get_bond_urls()
+
+    if bond_urls is None:
         print("Error: Bond table not found on the page.")
-    else:
-        bond_urls = []
-        for row in bond_table.find_all('tr')[1:]:
-            cells = row.find_all('td')
-            if len(cells) > 1:
-                link_tag = cells[1].find('a')
-                if link_tag and 'href' in link_tag.attrs:
-                    bond_url = urljoin(BASE_URL, link_tag['href'])
-                    bond_urls.append(bond_url)
-
-        historical_data_urls = []
-
-        for bond_url in bond_urls:
-            bond_response = requests.get(bond_url)
-            bond_response.raise_for_status()
-            bond_soup = BeautifulSoup(bond_response.content, 'html.parser')
-
-            historical_data_link = bond_soup.find('a', string="Historical Data")
-            if historical_data_link and 'href' in historical_data_link.attrs:
-                historical_data_url = historical_data_link['href']
-                historical_data_urls.append(historical_data_url)
-
-        bond_symbols = []
-
-        for bond_historical_data_url in historical_data_urls:
-            path = urlparse(bond_historical_data_url).path
-            symbol = path.split('/')[-1]
+        return None
+
+    db = get_database()
+
+    # Detail pages only map a bond URL to its symbol, so resolved URLs are kept in Mongo
+    # and only bond rows that have not been resolved before are fetched. A page without a
+    # "Historical Data" link is not stored, so its bond is looked up again on the next run.
+    known_symbols = {
+        document["_id"]: document["symbol"]
+        for document in db.bond_symbols.find({"_id": {"$in": bond_urls}, "symbol": {"$ne": None}})
+    }
+
+    new_bond_urls = [bond_url for bond_url in dict.fromkeys(bond_urls) if bond_url not in known_symbols]
+    if new_bond_urls:
+        resolved_symbols = asyncio.run(resolve_bond_symbols(new_bond_urls))
+        resolved_symbols = {bond_url: symbol for bond_url, symbol in resolved_symbols.items() if symbol}
+        if resolved_symbols:
+            db.bond_symbols.bulk_write([
+                pymongo.UpdateOne({"_id": bond_url}, {"$set": {"symbol": symbol}}, upsert=True)
+                for bond_url, symbol in resolved_symbols.items()
+            ])
+        known_symbols.update(resolved_symbols)
+
+    bond_symbols = []
+    for bond_url in bond_urls:
+        symbol = known_symbols.get(bond_url)
+        if symbol:
             bond_symbols.append(symbol)
 
-        return bond_symbols
\ No newline at end of file
+    return bond_symbols
@@ -1,12 +1,26 @@
+import pymongo
+from pymongo.errors import BulkWriteError
 from backend.app.filters.filter_one.bonds_extractor import get_bond_symbols
 from backend.database.setup_database import get_database
+from backend.database.data_versions import bump_data_version
 from backend.app.filters.filter_one.issuers_dropdown_scraper import scrape_issuers_dropdown
+from backend.app.filters.response_cache import response_cache, format_stats
 
-def run_filter_one():
+
+class IssuerWriteError(Exception):
+    pass
+
+
+def run_filter_one(job=None):
     db = get_database()
+    response_cache.reset_stats()
     issuer_symbols = scrape_issuers_dropdown()
     bonds_symbols = get_bond_symbols()
 
+    if job is not None:
+        job.raise_if_cancelled("Cancelled filter one before saving issuers")
+
+    operations = []
     for symbol in issuer_symbols:
         is_bond = symbol in bonds_symbols
         has_digit = any(char.isdigit() for char in symbol)
@@ -28,10 +42,31 @@ def run_filter_one():
         if is_watched is not None:
             update_data["is_watched"] = is_watched
 
-        db.issuers.update_one(
+        operations.append(pymongo.UpdateOne(
             {"symbol": symbol},
             {"$setOnInsert": update_data},
             upsert=True
-        )
+        ))
+
+    # One unordered batch for the whole dropdown; a failing symbol does not stop the others, but the job still
+    # fails once the rest are written.
+    failures = []
+    if operations:
+        try:
+            result = db.issuers.bulk_write(operations, ordered=False)
+            print(f"Filter one: {result.upserted_count} new issuers, {len(operations)} symbols checked.")
+        except BulkWriteError as e:
+            for error in e.details["writeErrors"]:
+                failures.append(f"{issuer_symbols[error['index']]}: {error['errmsg']}")
+                print(f"Error saving issuer {failures[-1]}")
+            print(f"Filter one: {e.details['nUpserted']} new issuers, "
+                  f"{len(failures)}/{len(operations)} symbols failed.")
+
+    bump_data_version(db)
+
+    if failures:
+        raise IssuerWriteError(f"Failed to save {len(failures)}/{len(operations)} issuers: {'; '.join(failures)}")
+
+    print(f"Filter one response cache: {format_stats(response_cache.stats())}")
 
     return "Successfully executed filter one!"
\ No newline at end of file
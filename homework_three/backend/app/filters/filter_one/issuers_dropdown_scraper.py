@@ -1,16 +1,22 @@
-import requests
 from bs4 import BeautifulSoup
+from backend.app.filters.fetch_engine import MSE_BASE_URL
+from backend.app.filters.response_cache import fetch_cached
 
-ISSUERS_LIST_URL = 'https://www.mse.mk/en/stats/symbolhistory/ADIN'
+ISSUERS_LIST_URL = f'{MSE_BASE_URL}/en/stats/symbolhistory/ADIN'
 
+ISSUERS_DROPDOWN_NAMESPACE = "issuers-dropdown"
 
-def scrape_issuers_dropdown():
-    response = requests.get(ISSUERS_LIST_URL)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, 'html.parser')
+
+def parse_issuers_dropdown(content):
+    soup = BeautifulSoup(content, 'html.parser')
 
     dropdown = soup.find('select', {'id': 'Code'})
     issuer_symbols = [option.get('value').strip() for option in dropdown.find_all('option') if
                       option.get('value').strip()]
 
-    return issuer_symbols
\ No newline at end of file
+    return issuer_symbols
+
+
+def scrape_issuers_dropdown():
+    page = fetch_cached(ISSUERS_LIST_URL)
+    return page.cache.parse(ISSUERS_DROPDOWN_NAMESPACE, page, parse_issuers_dropdown)
\ No newline at end of file
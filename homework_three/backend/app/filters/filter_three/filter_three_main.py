@@ -1,12 +1,125 @@
+import multiprocessing
+import os
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from backend.database.setup_database import get_database
-from backend.app.filters.filter_two.filter_two_main import scrape_data_for_issuer, get_last_scraped_date
+from backend.app.filters.fetch_engine import MAX_CONNECTIONS, MAX_CONNECTIONS_PER_HOST
+from backend.app.filters.response_cache import response_cache, merge_stats, format_stats
+from backend.app.filters.filter_two.filter_two_main import scrape_issuers
+from backend.app.filters.filter_two.ingest_pipeline import ingest_stats, merge_ingest_stats, format_ingest_stats
+from backend.app.filters.filter_three.scrape_plan import build_scrape_plan, format_plan
+from backend.app.filters.filter_three.scrape_runs import ScrapeCheckpoint, find_resumable_run, finish_run, run_plan, \
+    start_run
 
+FILTER_THREE_WORKERS = int(os.getenv("FILTER_THREE_WORKERS", str(os.cpu_count() or 1)))
 
-def run_filter_three():
+
+def partition_work(work, partitions):
+    chunks = [work[i::partitions] for i in range(partitions)]
+    return [chunk for chunk in chunks if chunk]
+
+
+def collect_results(work, results):
+    collected = []
+    for item, result in zip(work, results):
+        symbol = item["symbol"]
+        if isinstance(result, Exception):
+            collected.append({"symbol": symbol, "rows": 0, "error": f"{type(result).__name__}: {result}"})
+        else:
+            collected.append({"symbol": symbol, "rows": result, "error": None})
+    return collected
+
+
+def scrape_partition(work, workers, job=None, checkpoint=None):
+    # Runs inside a pool worker. The worker is spawned, so get_database() opens a client owned by this process,
+    # and the connection limits are split so the pool as a whole respects the configured totals.
+    results = scrape_issuers(
+        work,
+        job=job,
+        checkpoint=checkpoint,
+        max_connections=max(1, MAX_CONNECTIONS // workers),
+        max_connections_per_host=max(1, MAX_CONNECTIONS_PER_HOST // workers)
+    )
+    return collect_results(work, results), response_cache.stats(), ingest_stats.stats()
+
+
+def scrape_in_process_pool(work, workers, job=None, checkpoint=None):
+    partitions = partition_work(work, workers)
+    collected = []
+    cache_stats = []
+    pipeline_stats = []
+
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(partitions), mp_context=context) as executor:
+        futures = {
+            executor.submit(scrape_partition, partition, len(partitions), job, checkpoint): partition
+            for partition in partitions
+        }
+        for future in as_completed(futures):
+            try:
+                results, stats, stage_stats = future.result()
+                collected.extend(results)
+                cache_stats.append(stats)
+                pipeline_stats.append(stage_stats)
+            except Exception as e:
+                collected.extend(
+                    {"symbol": item["symbol"], "rows": 0, "error": f"Worker failed: {type(e).__name__}: {e}"}
+                    for item in futures[future]
+                )
+
+    return collected, merge_stats(*cache_stats), merge_ingest_stats(*pipeline_stats)
+
+
+def run_filter_three(workers=FILTER_THREE_WORKERS, job=None):
     db = get_database()
-    issuers = db.issuers.find({"valid": True})
+    response_cache.reset_stats()
+    ingest_stats.reset_stats()
+
+    # Progress is checkpointed in a scrapings document; a run that stopped earlier today is picked up where it left
+    # off instead of being planned again.
+    run_date = datetime.now().strftime("%Y-%m-%d")
+    run = find_resumable_run(db, run_date)
+    if run is None:
+        plan, skipped = build_scrape_plan(db)
+        print(f"Filter three plan: {format_plan(plan, skipped)}")
+        run = start_run(db, plan, run_date)
+    else:
+        finished = sum(1 for state in run["issuers"].values() if state.get("done"))
+        print(f"Resuming filter three run {run['_id']} ({finished}/{len(run['plan'])} issuers already scraped).")
+
+    checkpoint = ScrapeCheckpoint(run["_id"], run["issuers"])
+    # Issuers without missing trading days (e.g. on weekends) need no request at all.
+    work = [item for item in run_plan(run) if item["ranges"] != [] and not checkpoint.issuer_done(item["symbol"])]
+
+    if not work:
+        finish_run(db, run["_id"], {"issuers": 0, "failed": 0, "rows": 0})
+        return "Successfully executed filter three! (nothing to scrape)"
+
+    if job is not None:
+        job.set_total(len(work))
+
+    if workers > 1 and len(work) > 1:
+        results, cache_stats, pipeline_stats = scrape_in_process_pool(work, min(workers, len(work)), job, checkpoint)
+        # Folded into this process' counters, so callers read one set of ingest stats either way.
+        ingest_stats.merge(pipeline_stats)
+    else:
+        results = collect_results(work, scrape_issuers(work, job=job, checkpoint=checkpoint))
+        cache_stats = response_cache.stats()
+
+    failed = [result for result in results if result["error"]]
+    for result in failed:
+        print(f"Error scraping {result['symbol']}: {result['error']}")
+
+    print(f"Filter three response cache: {format_stats(cache_stats)}; {response_cache.prune()} stale files pruned")
+    print(f"Filter three ingest: {format_ingest_stats(ingest_stats.stats())}")
+
+    rows = sum(result["rows"] for result in results)
+    if job is not None:
+        job.raise_if_cancelled(f"Cancelled filter three ({len(results) - len(failed)}/{len(results)} issuers, "
+                               f"{rows} rows scraped)")
+
+    # With failed issuers the run stays open, so the next run today retries just those, from their last page.
+    if not failed:
+        finish_run(db, run["_id"], {"issuers": len(results), "failed": 0, "rows": rows})
 
-    for issuer in issuers:
-        symbol = issuer["symbol"]
-        scraping_date = get_last_scraped_date(symbol)
-        scrape_data_for_issuer(symbol, scraping_date)
\ No newline at end of file
+    return f"Successfully executed filter three! ({len(results) - len(failed)}/{len(results)} issuers, {rows} rows scraped)"
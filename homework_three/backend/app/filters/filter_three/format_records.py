@@ -1,8 +1,21 @@
-def format_macedonian_number(value):
-    value_str = str(value)
-    converted_value = value_str.replace('.', '#').replace(',', '.').replace('#', ',')
+from datetime import datetime
+from bson.int64 import Int64
+from backend.database.entry_format import INTEGER_COLUMNS
 
-    return converted_value
+
+def parse_number(value, integer=False):
+    value_str = str(value).strip().replace(',', '')
+    if not value_str:
+        return None
+
+    try:
+        number = float(value_str)
+    except ValueError:
+        return None
+
+    if integer:
+        return Int64(round(number))
+    return number
 
 
 def format_date(value):
@@ -20,13 +33,17 @@ def format_date(value):
     return converted_date
 
 
+def parse_date(value):
+    return datetime.strptime(format_date(value), "%m/%d/%Y")
+
+
 def format_scraped_record(record):
-    date_column = {"Date"}
+    date_column = {"date"}
 
     for header, value in record.items():
         if header not in date_column:
-            record[header] = format_macedonian_number(value)
+            record[header] = parse_number(value, integer=header in INTEGER_COLUMNS)
         elif header in date_column:
-            record[header] = format_date(value)
+            record[header] = parse_date(value)
 
-    return record
\ No newline at end of file
+    return record
@@ -0,0 +1,55 @@
+from datetime import datetime
+from backend.database.entry_format import parse_entry_date
+from backend.database.price_storage import distinct_entry_dates, stored_dates_by_symbol
+from backend.app.filters.trading_calendar import ONE_DAY, coverage_from_dates, day, merge_ranges, plan_windows
+
+
+def issuer_coverage(issuer, calendar, dates):
+    # The date ranges already scraped for an issuer. Issuers scraped before coverage was recorded get it
+    # reconstructed once from their stored dates.
+    if issuer.get("scraped_ranges"):
+        return merge_ranges((start, end) for start, end in issuer["scraped_ranges"])
+    if not dates:
+        return []
+
+    scraped_through = None
+    if issuer.get("last_scraped_date"):
+        scraped_through = parse_entry_date(issuer["last_scraped_date"]) - ONE_DAY
+    return coverage_from_dates(dates, calendar, scraped_through)
+
+
+def build_scrape_plan(db, today=None):
+    # Decides up front what filter three fetches. Issuers with history get exactly the trading-day windows missing
+    # from their coverage, holes included, with one request per calendar year; new issuers get their full history.
+    # Issuers whose last scrape ran today are left out.
+    today = day(today or datetime.now())
+    calendar = distinct_entry_dates(db)
+
+    issuers = list(db.issuers.find({"valid": True},
+                                   {"_id": 0, "symbol": 1, "last_scraped_date": 1, "scraped_ranges": 1}))
+    skipped = [issuer["symbol"] for issuer in issuers if issuer.get("last_scraped_date") == today.strftime("%Y-%m-%d")]
+    issuers = [issuer for issuer in issuers if issuer["symbol"] not in skipped]
+
+    # Issuers without recorded coverage have their stored dates read with one aggregation; once every issuer has
+    # been scraped with coverage, planning reads no entries at all.
+    legacy_dates = stored_dates_by_symbol(db, [issuer["symbol"] for issuer in issuers
+                                               if not issuer.get("scraped_ranges")])
+
+    plan = []
+    for issuer in issuers:
+        coverage = issuer_coverage(issuer, calendar, legacy_dates.get(issuer["symbol"]))
+        plan.append({
+            "symbol": issuer["symbol"],
+            "coverage": coverage,
+            "ranges": plan_windows(coverage, calendar, today) if coverage else None
+        })
+
+    return plan, skipped
+
+
+def format_plan(plan, skipped):
+    new = sum(1 for item in plan if item["ranges"] is None)
+    requests = sum(len(item["ranges"]) for item in plan if item["ranges"] is not None)
+    up_to_date = sum(1 for item in plan if item["ranges"] == [])
+    return (f"{len(plan) - new} issuers with history need {requests} requests ({up_to_date} have no missing trading "
+            f"days), {new} new issuers get their full history, {len(skipped)} already scraped today")
@@ -0,0 +1,89 @@
+import uuid
+from datetime import datetime
+from backend.database.setup_database import get_database
+
+SCRAPINGS_COLLECTION = "scrapings"
+
+
+def plan_document(plan):
+    return [
+        {
+            "symbol": item["symbol"],
+            "coverage": [[start, end] for start, end in item["coverage"]],
+            "ranges": None if item["ranges"] is None else [[start, end] for start, end in item["ranges"]]
+        }
+        for item in plan
+    ]
+
+
+def run_plan(run):
+    return [
+        {
+            "symbol": item["symbol"],
+            "coverage": [(start, end) for start, end in item["coverage"]],
+            "ranges": None if item["ranges"] is None else [(start, end) for start, end in item["ranges"]]
+        }
+        for item in run["plan"]
+    ]
+
+
+def start_run(db, plan, run_date):
+    run = {
+        "_id": uuid.uuid4().hex,
+        "status": "running",
+        "date": run_date,
+        "started_at": datetime.now(),
+        "plan": plan_document(plan),
+        "issuers": {}
+    }
+    db[SCRAPINGS_COLLECTION].insert_one(run)
+    return run
+
+
+def find_resumable_run(db, run_date):
+    # Only a run started the same day is resumed; an older one planned up to a day that has since moved on, and the
+    # issuers it finished already have their coverage recorded for a fresh plan.
+    db[SCRAPINGS_COLLECTION].update_many(
+        {"status": "running", "date": {"$ne": run_date}},
+        {"$set": {"status": "abandoned"}}
+    )
+    return db[SCRAPINGS_COLLECTION].find_one({"status": "running", "date": run_date}, sort=[("started_at", -1)])
+
+
+def finish_run(db, run_id, summary):
+    db[SCRAPINGS_COLLECTION].update_one(
+        {"_id": run_id},
+        {"$set": {"status": "done", "finished_at": datetime.now(), "summary": summary}}
+    )
+
+
+class ScrapeCheckpoint:
+    # Per-issuer, per-page checkpoints of a filter three run, kept in its scrapings document. A page is checkpointed
+    # right after its entries are written, so a restarted run skips every page it has and only repeats the pages
+    # that were in flight or waiting to be written. Like JobProgress it is pickled into the pool workers, together
+    # with the state the run was resumed from.
+    def __init__(self, run_id, issuers=None):
+        self.run_id = run_id
+        self.issuers = issuers or {}
+
+    def completed_pages(self, symbol):
+        return self.issuers.get(symbol, {}).get("pages", [])
+
+    def issuer_done(self, symbol):
+        return self.issuers.get(symbol, {}).get("done", False)
+
+    def pages_done(self, pages):
+        # Checkpoints the (symbol, page) pairs of one write batch with a single update.
+        pushed = {}
+        for symbol, page in pages:
+            pushed.setdefault(f"issuers.{symbol}.pages", []).append(page)
+        get_database()[SCRAPINGS_COLLECTION].update_one(
+            {"_id": self.run_id},
+            {"$push": {path: {"$each": symbol_pages} for path, symbol_pages in pushed.items()}}
+        )
+
+    def finish_issuer(self, symbol, rows):
+        get_database()[SCRAPINGS_COLLECTION].update_one(
+            {"_id": self.run_id},
+            {"$set": {f"issuers.{symbol}.done": True, f"issuers.{symbol}.rows": rows}}
+        )
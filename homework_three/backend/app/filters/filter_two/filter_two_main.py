@@ -1,34 +1,18 @@
 from backend.database.setup_database import get_database
-import requests
-from bs4 import BeautifulSoup
-from collections import OrderedDict
+from backend.database.data_versions import bump_data_version
+import asyncio
 from datetime import datetime
-from backend.app.filters.filter_three.format_records import format_scraped_record
-import pymongo
+from backend.app.analytics.period_aggregates import refresh_period_aggregates
+from backend.app.filters.fetch_engine import MSE_BASE_URL, FetchEngine
+from backend.app.filters.trading_calendar import ONE_DAY, merge_ranges
+from backend.app.filters.filter_two.ingest_pipeline import IngestPipeline
 
-BASE_URL_TEMPLATE = "https://www.mse.mk/en/stats/symbolhistory/{}/?FromDate={}&ToDate={}"
+BASE_URL_TEMPLATE = MSE_BASE_URL + "/en/stats/symbolhistory/{}/?FromDate={}&ToDate={}"
 
+MAX_VALID_YEARS = 10
 
-def get_last_scraped_date(symbol):
-    db = get_database()
-
-    result = db.data_entries.find_one(
-        {"symbol": symbol},
-        sort=[("date", -1)],
-        projection={"date": 1}
-    )
-    return result.get("date") if result else None
-
-
-def scrape_data_for_issuer(symbol, scraping_date=None):
-    db = get_database()
-
-    system_date = f"{datetime.now().month}/{datetime.now().day}/{datetime.now().year}"
-    system_date_formatted = datetime.strptime(system_date, "%m/%d/%Y").strftime("%Y-%m-%d")
-
-    data = []
-    valid_years = 0
 
+def build_year_ranges(scraping_date, system_date):
     if not scraping_date:
         scraping_date = f"1/1/{datetime.now().year}"
         end_year = 1994
@@ -38,10 +22,8 @@ def scrape_data_for_issuer(symbol, scraping_date=None):
         end_year = start_year - 1
         scraping_date = datetime.strptime(scraping_date, "%Y-%m-%d").strftime("%m/%d/%Y")
 
+    year_ranges = []
     for year in range(start_year, end_year, -1):
-        if valid_years >= 10:
-            break
-
         if scraping_date == system_date:
             year_start_date = system_date
             year_end_date = system_date
@@ -52,66 +34,137 @@ def scrape_data_for_issuer(symbol, scraping_date=None):
             year_start_date = f"1/1/{year}"
             year_end_date = f"12/31/{year}"
 
-        # if year == start_year:
-        #     year_start_date = scraping_date
-        # else:
-        #     year_start_date = f"1/1/{year}"
-        # year_end_date = f"12/31/{year}"
-
-
-        url = BASE_URL_TEMPLATE.format(symbol, year_start_date, year_end_date)
-
-        response = requests.get(url)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        no_data_div = soup.find('div', class_='col-md-12')
-        if no_data_div and "No data" in no_data_div.get_text():
-            continue
-
-        table = soup.find('table')
-        if not table:
-            continue
-
-        headers = [
-            th.get_text(strip=True)
-            .replace(' ', '_')
-            .replace('%', 'pct')
-            .lower()
-            .replace('.', '')
-            for th in table.find_all('th')
-        ]
-
-        for row in table.find_all('tr')[1:]:
-            cells = row.find_all('td')
-            if len(cells) != len(headers):
-                continue
-            record = OrderedDict()
-            for header, cell in zip(headers, cells):
-                record[header] = cell.get_text(strip=True)
-            format_scraped_record(record)
-            record['symbol'] = symbol
-            record['date'] = record.get('date', system_date_formatted)
-            record['date'] = datetime.strptime(record['date'], "%m/%d/%Y").strftime("%Y-%m-%d")
-            data.append(record)
-
-        valid_years += 1
-
-    bulk_operations = [
-        pymongo.UpdateOne(
-            {"symbol": record["symbol"], "date": record["date"]},
-            {"$set": record},
-            upsert=True
-        )
-        for record in data
-    ]
+        year_ranges.append((year_start_date, year_end_date))
+
+    return year_ranges
 
-    if bulk_operations:
-        db.data_entries.bulk_write(bulk_operations)
+
+def save_scraped_data(symbol, since, system_date_formatted, coverage=None):
+    # Finishes an issuer once all its year pages are written: the period bars from `since`, the earliest scraped
+    # date, are recomputed and the coverage and data version are updated.
+    db = get_database()
+
+    if since is not None:
+        refresh_period_aggregates(db, symbol, since=since)
+
+    update = {"last_scraped_date": system_date_formatted}
+    if coverage is not None:
+        update["scraped_ranges"] = [[start, end] for start, end in coverage]
 
     db.issuers.update_one(
         {"symbol": symbol},
-        {"$set": {"last_scraped_date": system_date_formatted}},
+        {"$set": update},
         upsert=True
-    )
\ No newline at end of file
+    )
+
+    bump_data_version(db, [symbol])
+
+
+async def scrape_year_page(engine, pipeline, symbol, year_range, system_date_formatted, job=None):
+    page = await pipeline.fetch(engine, BASE_URL_TEMPLATE.format(symbol, *year_range),
+                                job.check_cancelled if job is not None else None)
+    return await pipeline.submit(symbol, year_range, page, system_date_formatted)
+
+
+async def fetch_issuer_data(engine, pipeline, symbol, year_ranges, system_date_formatted,
+                            max_valid_years=MAX_VALID_YEARS, job=None):
+    # Returns a summary ({"range", "valid", "rows", "earliest"}) of every page that was requested, in order. Pages
+    # go through the ingest pipeline, so only the pages in its queues are held in memory, and pages already
+    # checkpointed by an interrupted run are taken from the checkpoint instead of being fetched again.
+    checkpoint = pipeline.checkpoint
+    completed = {tuple(page["range"]): page for page in checkpoint.completed_pages(symbol)} if checkpoint else {}
+
+    async def year_page(year_range):
+        if tuple(year_range) in completed:
+            return completed[tuple(year_range)]
+        return await scrape_year_page(engine, pipeline, symbol, year_range, system_date_formatted, job)
+
+    pages = []
+    valid_years = 0
+    position = 0
+    max_valid_years = max_valid_years or len(year_ranges)
+
+    # Year pages are requested in waves sized to the number of valid years still missing,
+    # so issuers with a long history do not fetch pages past the ten-year cutoff.
+    while valid_years < max_valid_years and position < len(year_ranges):
+        wave = year_ranges[position:position + max_valid_years - valid_years]
+        position += len(wave)
+
+        wave_pages = await asyncio.gather(*(year_page(year_range) for year_range in wave))
+        pages.extend(wave_pages)
+        valid_years += sum(1 for page in wave_pages if page["valid"])
+
+    return pages
+
+
+async def scrape_data_for_issuer_async(engine, pipeline, symbol, ranges=None, coverage=None, job=None):
+    # `ranges` are the (start, end) datetime windows planned for an issuer with history; None scrapes the full
+    # history of a new issuer. Coverage recorded afterwards never includes today, whose entries may still change.
+    system_date = f"{datetime.now().month}/{datetime.now().day}/{datetime.now().year}"
+    system_date_formatted = datetime.strptime(system_date, "%m/%d/%Y").strftime("%Y-%m-%d")
+
+    if ranges is None:
+        year_ranges = build_year_ranges(None, system_date)
+        pages = await fetch_issuer_data(engine, pipeline, symbol, year_ranges, system_date_formatted, job=job)
+    else:
+        year_ranges = [(start.strftime("%m/%d/%Y"), end.strftime("%m/%d/%Y")) for start, end in ranges]
+        pages = await fetch_issuer_data(engine, pipeline, symbol, year_ranges, system_date_formatted,
+                                        max_valid_years=None, job=job)
+
+    yesterday = datetime.strptime(system_date_formatted, "%Y-%m-%d") - ONE_DAY
+    covered = [
+        (start, min(end, yesterday))
+        for start, end in ((datetime.strptime(page["range"][0], "%m/%d/%Y"),
+                            datetime.strptime(page["range"][1], "%m/%d/%Y")) for page in pages)
+        if start <= yesterday
+    ]
+    coverage = merge_ranges(list(coverage or []) + covered)
+    since = min((page["earliest"] for page in pages if page["earliest"] is not None), default=None)
+
+    await asyncio.to_thread(save_scraped_data, symbol, since, system_date_formatted, coverage)
+
+    rows = sum(page["rows"] for page in pages)
+    if pipeline.checkpoint is not None:
+        await asyncio.to_thread(pipeline.checkpoint.finish_issuer, symbol, rows)
+    return rows
+
+
+async def scrape_plan_item(engine, pipeline, item, job=None):
+    scrape = scrape_data_for_issuer_async(engine, pipeline, item["symbol"], item.get("ranges"), item.get("coverage"),
+                                          job)
+    if job is None:
+        return await scrape
+
+    try:
+        rows = await scrape
+    except Exception as e:
+        await asyncio.to_thread(job.issuer_finished, item["symbol"], error=e)
+        raise
+    await asyncio.to_thread(job.issuer_finished, item["symbol"], rows)
+    return rows
+
+
+async def scrape_issuers_async(issuers, engine=None, job=None, checkpoint=None, **engine_options):
+    # `issuers` are scrape plan items: {"symbol", "ranges", "coverage"}. With a job, every issuer's outcome is
+    # reported as it finishes and cancellation stops the remaining issuers before their next page request. With a
+    # checkpoint, pages are checkpointed as they are written and a resumed run skips the ones it already has.
+    if engine is None:
+        async with FetchEngine(**engine_options) as engine:
+            return await scrape_issuers_async(issuers, engine, job, checkpoint)
+
+    async with IngestPipeline(checkpoint) as pipeline:
+        return await asyncio.gather(
+            *(scrape_plan_item(engine, pipeline, item, job) for item in issuers),
+            return_exceptions=True
+        )
+
+
+def scrape_issuers(issuers, job=None, checkpoint=None, **engine_options):
+    return asyncio.run(scrape_issuers_async(issuers, job=job, checkpoint=checkpoint, **engine_options))
+
+
+def scrape_data_for_issuer(symbol, ranges=None, coverage=None):
+    result = scrape_issuers([{"symbol": symbol, "ranges": ranges, "coverage": coverage}])[0]
+    if isinstance(result, Exception):
+        raise result
+    return result
@@ -0,0 +1,223 @@
+import asyncio
+import os
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from backend.database.setup_database import get_database
+from backend.database.price_storage import write_entry_batch
+from backend.app.filters.filter_two.table_parser import extract_history_table
+from backend.app.filters.filter_three.format_records import format_scraped_record
+
+HISTORY_TABLE_NAMESPACE = "symbol-history-columns"
+
+# Pages parsed or formatted but not yet written are bounded by the queue sizes, so fetching slows down to the pace
+# of the later stages instead of piling pages up in memory.
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))
+INGEST_PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "2"))
+# A write batch is flushed once it holds this many rows or its oldest page has waited this long.
+INGEST_WRITE_BATCH_ROWS = int(os.getenv("INGEST_WRITE_BATCH_ROWS", "2000"))
+INGEST_WRITE_BATCH_SECONDS = float(os.getenv("INGEST_WRITE_BATCH_SECONDS", "0.5"))
+
+STAGES = ["fetch", "parse", "format", "write"]
+
+DONE = object()
+
+
+class IngestStats:
+    # Per-stage counters for one process: items and rows through each stage, the time spent in it and the deepest
+    # the queue in front of it got. Like the response cache stats, pool workers return theirs to be merged.
+    def __init__(self):
+        self.counters = Counter()
+
+    def record(self, stage, seconds, items=1, rows=0):
+        self.counters[f"{stage}_items"] += items
+        self.counters[f"{stage}_rows"] += rows
+        self.counters[f"{stage}_seconds"] += seconds
+
+    def record_depth(self, stage, depth):
+        self.counters[f"{stage}_queue_max"] = max(self.counters[f"{stage}_queue_max"], depth)
+
+    def stats(self):
+        return dict(self.counters)
+
+    def merge(self, stats):
+        self.counters = Counter(merge_ingest_stats(self.stats(), stats))
+
+    def reset_stats(self):
+        self.counters.clear()
+
+
+def merge_ingest_stats(*stats):
+    merged = Counter()
+    for entry in stats:
+        for key, value in entry.items():
+            merged[key] = max(merged[key], value) if key.endswith("_max") else merged[key] + value
+    return dict(merged)
+
+
+def format_ingest_stats(stats):
+    parts = []
+    for stage in STAGES:
+        items = stats.get(f"{stage}_items", 0)
+        seconds = stats.get(f"{stage}_seconds", 0)
+        per_item = seconds / items * 1000 if items else 0
+        part = f"{stage} {items} items, {per_item:.1f} ms each"
+        if stats.get(f"{stage}_rows"):
+            part += f", {stats[f'{stage}_rows']} rows"
+        if stage != "fetch":
+            part += f", queue max {stats.get(f'{stage}_queue_max', 0)}"
+        parts.append(part)
+    return "; ".join(parts)
+
+
+ingest_stats = IngestStats()
+
+
+def build_records(table, symbol, system_date_formatted):
+    records = []
+    for row in zip(*table["columns"]):
+        record = OrderedDict(zip(table["headers"], row))
+        format_scraped_record(record)
+        record['symbol'] = symbol
+        record['date'] = record.get('date') or datetime.strptime(system_date_formatted, "%Y-%m-%d")
+        records.append(record)
+
+    return records
+
+
+def resolve(future, result=None, error=None):
+    # The issuer waiting on a page may have been cancelled meanwhile.
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class IngestPipeline:
+    # Fetched year pages flow through parse -> format -> write stages joined by bounded queues, so parsing runs
+    # while further pages download and Mongo writes while both go on. Parsing and formatting run in threads to keep
+    # the event loop free for the fetches. The writer coalesces pages of all issuers into batches. submit() returns
+    # a future with the page's summary ({"range", "valid", "rows", "earliest"}), resolved once the page is written
+    # and, with a checkpoint, checkpointed.
+    def __init__(self, checkpoint=None, queue_size=INGEST_QUEUE_SIZE, parse_workers=INGEST_PARSE_WORKERS,
+                 batch_rows=INGEST_WRITE_BATCH_ROWS, batch_seconds=INGEST_WRITE_BATCH_SECONDS, stats=ingest_stats):
+        self.checkpoint = checkpoint
+        self.queue_size = queue_size
+        self.parse_workers = parse_workers
+        self.batch_rows = batch_rows
+        self.batch_seconds = batch_seconds
+        self.stats = stats
+        self.queues = {}
+        self.tasks = []
+
+    async def __aenter__(self):
+        self.queues = {stage: asyncio.Queue(maxsize=self.queue_size) for stage in STAGES[1:]}
+        self.tasks = [asyncio.create_task(self.parse_stage()) for _ in range(self.parse_workers)]
+        self.tasks.append(asyncio.create_task(self.format_stage()))
+        self.tasks.append(asyncio.create_task(self.write_stage()))
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        for _ in range(self.parse_workers):
+            await self.queues["parse"].put(DONE)
+        await asyncio.gather(*self.tasks[:self.parse_workers])
+        await self.queues["format"].put(DONE)
+        await self.tasks[-2]
+        await self.queues["write"].put(DONE)
+        await self.tasks[-1]
+
+    async def put(self, stage, item):
+        await self.queues[stage].put(item)
+        self.stats.record_depth(stage, self.queues[stage].qsize())
+
+    async def fetch(self, engine, url, before_request=None):
+        started = time.perf_counter()
+        page = await engine.fetch(url, before_request)
+        self.stats.record("fetch", time.perf_counter() - started)
+        return page
+
+    async def submit(self, symbol, year_range, page, system_date_formatted):
+        future = asyncio.get_running_loop().create_future()
+        await self.put("parse", (symbol, year_range, page, system_date_formatted, future))
+        return await future
+
+    async def parse_stage(self):
+        while (item := await self.queues["parse"].get()) is not DONE:
+            symbol, year_range, page, system_date_formatted, future = item
+            started = time.perf_counter()
+            try:
+                table = await asyncio.to_thread(page.cache.parse, HISTORY_TABLE_NAMESPACE, page, extract_history_table)
+            except Exception as e:
+                resolve(future, error=e)
+                continue
+            self.stats.record("parse", time.perf_counter() - started)
+            await self.put("format", (symbol, year_range, table, system_date_formatted, future))
+
+    async def format_stage(self):
+        while (item := await self.queues["format"].get()) is not DONE:
+            symbol, year_range, table, system_date_formatted, future = item
+            started = time.perf_counter()
+            records = None
+            if table is not None:
+                try:
+                    records = await asyncio.to_thread(build_records, table, symbol, system_date_formatted)
+                except Exception as e:
+                    resolve(future, error=e)
+                    continue
+            self.stats.record("format", time.perf_counter() - started, rows=len(records or []))
+
+            page = {
+                "range": list(year_range),
+                "valid": records is not None,
+                "rows": len(records or []),
+                "earliest": min((record["date"] for record in records), default=None) if records else None
+            }
+            await self.put("write", (symbol, records or [], page, future))
+
+    async def write_stage(self):
+        batch = []
+        rows = 0
+        deadline = None
+        finished = False
+        while not finished:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(self.queues["write"].get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is DONE:
+                finished = True
+            elif item is not None:
+                batch.append(item)
+                rows += len(item[1])
+                if deadline is None:
+                    deadline = time.monotonic() + self.batch_seconds
+
+            if batch and (finished or item is None or rows >= self.batch_rows):
+                await self.write_batch(batch, rows)
+                batch = []
+                rows = 0
+                deadline = None
+
+    async def write_batch(self, batch, rows):
+        started = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.flush, batch)
+        except Exception as e:
+            for _, _, _, future in batch:
+                resolve(future, error=e)
+            return
+        self.stats.record("write", time.perf_counter() - started, items=len(batch), rows=rows)
+        for _, _, page, future in batch:
+            resolve(future, page)
+
+    def flush(self, batch):
+        # Entries are written before their pages are checkpointed, so a checkpointed page is always stored.
+        records = [record for _, page_records, _, _ in batch for record in page_records]
+        if records:
+            write_entry_batch(get_database(), records)
+        if self.checkpoint is not None:
+            self.checkpoint.pages_done([(symbol, page) for symbol, _, page, _ in batch])
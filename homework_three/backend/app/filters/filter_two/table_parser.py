@@ -0,0 +1,79 @@
+from lxml import etree
+
+NO_DATA_CLASS = "col-md-12"
+NO_DATA_TEXT = "No data"
+FEED_CHUNK_SIZE = 64 * 1024
+
+
+def element_text(element):
+    # Same result as BeautifulSoup's get_text(strip=True): every text node stripped and joined without a separator.
+    return "".join(text.strip() for text in element.itertext(etree.Element) if text.strip())
+
+
+def normalize_header(text):
+    return text.replace(' ', '_').replace('%', 'pct').lower().replace('.', '')
+
+
+def parse_events(content, tag):
+    # Feeds the page to lxml's pull parser in chunks and yields the events of each chunk as soon as it is parsed.
+    # This is what iterparse(html=True) does, without the deprecated strip_cdata option it passes to HTMLParser.
+    parser = etree.HTMLPullParser(events=("start", "end"), tag=tag, recover=True, remove_comments=True)
+    for offset in range(0, len(content), FEED_CHUNK_SIZE):
+        parser.feed(content[offset:offset + FEED_CHUNK_SIZE])
+        yield from parser.read_events()
+    parser.close()
+    yield from parser.read_events()
+
+
+def extract_history_table(content):
+    # Streams through the page with lxml's pull parser and keeps only the first table, discarding each row as soon
+    # as its cells have been read, so no full document tree is built. The result mirrors the former
+    # BeautifulSoup extraction: None for "No data" pages and pages without a table, otherwise the normalized
+    # headers and one list of cell values per column for every row whose cell count matches the headers.
+    no_data_div = None
+    no_data = False
+    table = None
+    table_done = False
+    seen_first_row = False
+    headers = []
+    rows = []
+
+    for event, element in parse_events(content, ("div", "table", "th", "tr")):
+        tag = element.tag
+
+        if tag == "div":
+            if event == "start" and no_data_div is None and NO_DATA_CLASS in (element.get("class") or "").split():
+                no_data_div = element
+            elif event == "end" and element is no_data_div:
+                no_data = NO_DATA_TEXT in "".join(element.itertext(etree.Element))
+            continue
+
+        if tag == "table":
+            if event == "start" and table is None:
+                table = element
+            elif event == "end" and element is table:
+                table_done = True
+            continue
+
+        if event != "end" or table is None or table_done:
+            continue
+
+        if tag == "th":
+            headers.append(normalize_header(element_text(element)))
+        elif tag == "tr":
+            if seen_first_row:
+                cells = [element_text(cell) for cell in element.iter("td")]
+                rows.append(cells)
+            seen_first_row = True
+
+            element.clear(keep_tail=True)
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    if no_data or table is None:
+        return None
+
+    rows = [cells for cells in rows if len(cells) == len(headers)]
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in headers]
+
+    return {"headers": headers, "columns": columns}
@@ -0,0 +1,72 @@
+import asyncio
+import os
+import time
+from datetime import datetime
+from backend.database.setup_database import get_database
+
+JOBS_COLLECTION = "pipeline_jobs"
+
+# How often a running job looks up whether it was cancelled; filter three checks before every page request.
+JOB_CANCEL_CHECK_SECONDS = float(os.getenv("JOB_CANCEL_CHECK_SECONDS", "1"))
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class JobProgress:
+    # Handed to the pipeline code of a running job. It only carries the job id, so it can be pickled into the filter
+    # three pool workers, which report their issuers and notice cancellation through Mongo like the parent does.
+    # Progress is written to the app_status document, guarded by the job id so a finished job cannot overwrite
+    # the progress of the next one.
+    def __init__(self, job_id):
+        self.job_id = job_id
+        self.cancelled = False
+        self.checked_at = 0.0
+
+    def update_status(self, update):
+        db = get_database()
+        db.app_status.update_one({"job.id": self.job_id}, update)
+        db[JOBS_COLLECTION].update_one({"_id": self.job_id}, {"$set": {"heartbeat_at": datetime.now()}})
+
+    def set_total(self, total):
+        self.update_status({"$set": {"job.total": total}})
+
+    def issuer_finished(self, symbol, rows=0, error=None):
+        if error is None:
+            state = {"status": "done", "rows": rows}
+            counter = "job.completed"
+        elif isinstance(error, JobCancelled):
+            state = {"status": "cancelled", "rows": 0}
+            counter = "job.cancelled"
+        else:
+            state = {"status": "failed", "rows": 0, "error": f"{type(error).__name__}: {error}"}
+            counter = "job.failed"
+
+        self.update_status({"$set": {f"job.issuers.{symbol}": state}, "$inc": {counter: 1}})
+
+    def lookup_due(self):
+        return not self.cancelled and time.monotonic() - self.checked_at >= JOB_CANCEL_CHECK_SECONDS
+
+    def lookup_cancelled(self):
+        job = get_database()[JOBS_COLLECTION].find_one({"_id": self.job_id}, {"cancel_requested": 1})
+        self.cancelled = bool(job and job.get("cancel_requested"))
+        return self.cancelled
+
+    def is_cancelled(self):
+        if self.lookup_due():
+            self.checked_at = time.monotonic()
+            self.lookup_cancelled()
+        return self.cancelled
+
+    def raise_if_cancelled(self, message="Job was cancelled"):
+        if self.is_cancelled():
+            raise JobCancelled(message)
+
+    async def check_cancelled(self, message="Job was cancelled"):
+        # The event loop variant: a due lookup runs on a thread, and requests checking meanwhile go by the last result.
+        if self.lookup_due():
+            self.checked_at = time.monotonic()
+            await asyncio.to_thread(self.lookup_cancelled)
+        if self.cancelled:
+            raise JobCancelled(message)
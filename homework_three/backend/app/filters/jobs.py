@@ -0,0 +1,216 @@
+import os
+import queue
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from backend.database.setup_database import get_database
+from backend.database.indexes import ensure_collection_indexes
+from backend.app.filters.job_progress import JOBS_COLLECTION, JobCancelled, JobProgress
+from backend.app.filters.filter_one.filter_one_main import run_filter_one
+from backend.app.filters.filter_three.filter_three_main import run_filter_three
+
+# A queued or running job of another process that has not reported progress for this long is treated as abandoned
+# (e.g. that process was restarted mid-run), so it no longer swallows new triggers.
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "900"))
+
+JOB_HISTORY_LIMIT = 20
+
+ACTIVE_STATUSES = ["queued", "running"]
+
+JOB_TASKS = {
+    "filter-one": run_filter_one,
+    "filter-three": run_filter_three
+}
+
+# Identifies the jobs queued by this process, whose liveness does not depend on their heartbeat.
+OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+job_index_ready = False
+
+
+def new_job(kind):
+    now = datetime.now()
+    return {
+        "_id": uuid.uuid4().hex,
+        "kind": kind,
+        "status": "queued",
+        "owner": OWNER,
+        "cancel_requested": False,
+        "created_at": now,
+        "heartbeat_at": now
+    }
+
+
+def job_summary(job):
+    summary = {key: value for key, value in job.items() if key not in ("_id", "owner")}
+    summary["id"] = job["_id"]
+    return summary
+
+
+def find_active_job(db, kind):
+    cutoff = datetime.now() - timedelta(seconds=JOB_STALE_SECONDS)
+    return db[JOBS_COLLECTION].find_one(
+        {
+            "kind": kind,
+            "status": {"$in": ACTIVE_STATUSES},
+            "$or": [{"owner": OWNER}, {"heartbeat_at": {"$gte": cutoff}}]
+        },
+        sort=[("created_at", -1)]
+    )
+
+
+def abandon_stale_jobs(db, kind):
+    cutoff = datetime.now() - timedelta(seconds=JOB_STALE_SECONDS)
+    db[JOBS_COLLECTION].update_many(
+        {"kind": kind, "status": {"$in": ACTIVE_STATUSES}, "owner": {"$ne": OWNER}, "heartbeat_at": {"$lt": cutoff}},
+        {"$set": {"status": "abandoned", "finished_at": datetime.now()}}
+    )
+
+
+def ensure_job_index(db):
+    # The unique index on the kind of active jobs is what makes claim_job atomic, so it is built before the first
+    # job of the process rather than left to the background index build.
+    global job_index_ready
+    if not job_index_ready:
+        ensure_collection_indexes(db, JOBS_COLLECTION)
+        job_index_ready = True
+
+
+def claim_job(db, kind):
+    # Returns (job, created): a new queued job, or the queued or running job of the same kind. Of two processes
+    # racing, only one insert passes the unique index; the other joins the job that won. An active job that went
+    # stale also fails the insert, so it is marked abandoned and the insert retried.
+    ensure_job_index(db)
+    while True:
+        active = find_active_job(db, kind)
+        if active is not None:
+            return active, False
+
+        job = new_job(kind)
+        try:
+            db[JOBS_COLLECTION].insert_one(job)
+            return job, True
+        except DuplicateKeyError:
+            abandon_stale_jobs(db, kind)
+
+
+def find_job(db, job_id):
+    return db[JOBS_COLLECTION].find_one({"_id": job_id})
+
+
+def find_recent_jobs(db, limit=JOB_HISTORY_LIMIT):
+    return list(db[JOBS_COLLECTION].find({}, sort=[("created_at", -1)], limit=limit))
+
+
+def finish_job(db, job_id, status, update):
+    now = datetime.now()
+    db[JOBS_COLLECTION].update_one(
+        {"_id": job_id},
+        {"$set": {"status": status, "finished_at": now, "heartbeat_at": now, **update}}
+    )
+    db.app_status.update_one({"job.id": job_id}, {"$set": {"job.status": status, **{
+        f"job.{key}": value for key, value in update.items()
+    }}})
+
+
+def run_job(db, job_id):
+    now = datetime.now()
+    job = db[JOBS_COLLECTION].find_one_and_update(
+        {"_id": job_id, "status": "queued"},
+        {"$set": {"status": "running", "started_at": now, "heartbeat_at": now}},
+        return_document=ReturnDocument.AFTER
+    )
+    if job is None:
+        # Cancelled while it was waiting in the queue.
+        return None
+
+    db.app_status.update_one({}, {"$set": {"job": {
+        "id": job_id,
+        "kind": job["kind"],
+        "status": "running",
+        "started_at": now,
+        "total": 0,
+        "completed": 0,
+        "failed": 0,
+        "cancelled": 0,
+        "issuers": {}
+    }}}, upsert=True)
+
+    try:
+        message = JOB_TASKS[job["kind"]](job=JobProgress(job_id))
+        finish_job(db, job_id, "done", {"message": message})
+    except JobCancelled as e:
+        finish_job(db, job_id, "cancelled", {"message": str(e)})
+    except Exception as e:
+        print(f"Job {job_id} ({job['kind']}) failed: {type(e).__name__}: {e}")
+        finish_job(db, job_id, "failed", {"error": f"{type(e).__name__}: {e}"})
+
+    return find_job(db, job_id)
+
+
+def run_job_now(db, kind):
+    # Runs a job on the calling thread, for the pipeline container. It is still recorded, so triggers from the API
+    # meanwhile join it instead of scraping the same issuers a second time, and if the API got there first, that
+    # job is left to the API.
+    job, created = claim_job(db, kind)
+    if not created:
+        print(f"A {kind} job is already {job['status']} ({job['_id']}), not starting another.")
+        return job
+    return run_job(db, job["_id"])
+
+
+def cancel_job(db, job_id):
+    # A queued job is dropped right away; a running one stops at its next cancellation check.
+    job = db[JOBS_COLLECTION].find_one_and_update(
+        {"_id": job_id, "status": {"$in": ACTIVE_STATUSES}},
+        {"$set": {"cancel_requested": True}},
+        return_document=ReturnDocument.AFTER
+    )
+    if job is None:
+        return find_job(db, job_id)
+
+    if job["status"] == "queued":
+        db[JOBS_COLLECTION].update_one(
+            {"_id": job_id, "status": "queued"},
+            {"$set": {"status": "cancelled", "finished_at": datetime.now(), "message": "Cancelled before starting"}}
+        )
+    return find_job(db, job_id)
+
+
+class JobRunner:
+    # Executes pipeline jobs one at a time on a background thread, so API requests return immediately and scrapes
+    # triggered from the API never overlap within the process. A trigger while a job of the same kind is queued or
+    # running anywhere returns that job instead of queueing another.
+    def __init__(self):
+        self.queue = queue.Queue()
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def submit(self, kind):
+        with self.lock:
+            job, created = claim_job(get_database(), kind)
+            if created:
+                self.queue.put(job["_id"])
+                self.start()
+            return job, created
+
+    def start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.work, name="pipeline-jobs", daemon=True)
+            self.thread.start()
+
+    def work(self):
+        while True:
+            job_id = self.queue.get()
+            try:
+                run_job(get_database(), job_id)
+            except Exception as e:
+                print(f"Job {job_id} could not be run: {type(e).__name__}: {e}")
+            finally:
+                self.queue.task_done()
+
+
+job_runner = JobRunner()
@@ -1,6 +1,9 @@
-from backend.app.filters.filter_one.filter_one_main import run_filter_one
-from backend.app.filters.filter_three.filter_three_main import run_filter_three
+from backend.app.filters.jobs import run_job_now
 from backend.database.setup_database import get_database, setup_collections
+from backend.database.indexes import ensure_indexes_in_background
+from backend.database.data_versions import bump_data_version
+from backend.database.price_storage import stored_symbols
+from backend.app.analytics.period_aggregates import ensure_period_aggregates
 
 if __name__ == "__main__":
     db = get_database()
@@ -12,33 +15,35 @@ if __name__ == "__main__":
 
     setup_collections()
 
+    index_build = ensure_indexes_in_background(db)
+
+    ensure_period_aggregates(db)
+
+    # Entries may have been seeded or rebuilt above, so every stored symbol gets a new version.
+    bump_data_version(db, stored_symbols(db))
+
     db.app_status.update_one(
         {},
         {"$set": {"status": "unready", "details": "Running pipeline"}},
         upsert=True)
 
-    run_filter_one()
+    run_job_now(db, "filter-one")
 
-    run_filter_three()
+    run_job_now(db, "filter-three")
 
     db.app_status.update_one(
         {},
         {"$set": {"status": "unready", "details": "Configuring database"}},
         upsert=True)
 
-    existing_indexes_issuers = db.issuers.index_information()
-    if 'valid_1' not in existing_indexes_issuers:
-        db.issuers.create_index([('valid', 1)], name='valid_1')
-    if 'symbol_1' not in existing_indexes_issuers:
-        db.issuers.create_index([('symbol', 1)], name='symbol_1')
-    if 'watched_1' not in existing_indexes_issuers:
-        db.issuers.create_index([('is_watched', 1)], name='watched_1')
-
-    existing_indexes_data_entries = db.data_entries.index_information()
-    if 'symbol_1' not in existing_indexes_data_entries:
-        db.data_entries.create_index([('symbol', 1)], name='symbol_1')
-    if 'date_1' not in existing_indexes_data_entries:
-        db.data_entries.create_index([('date', 1)], name='date_1')
+    try:
+        index_build.result()
+    except Exception as e:
+        db.app_status.update_one(
+            {},
+            {"$set": {"status": "error", "details": f"Building indexes failed: {e}"}},
+            upsert=True)
+        raise
 
     db.app_status.update_one(
         {},
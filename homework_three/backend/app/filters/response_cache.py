@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime
+from urllib.parse import urlparse, parse_qs
+
+import requests
+
+CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", "/app/backend/cache")
+CACHE_ENABLED = os.getenv("SCRAPER_CACHE_ENABLED", "1") == "1"
+CACHE_TTL_SECONDS = int(os.getenv("SCRAPER_CACHE_TTL_SECONDS", "0"))
+
+IMMUTABLE = "immutable"
+REVALIDATE = "revalidate"
+
+
+def freshness_rule(url):
+    # Symbol history pages whose window ends in a closed year never change, so they are cached forever.
+    # Everything else (the current year, issuer dropdown, bond pages) is revalidated with the server.
+    to_date = parse_qs(urlparse(url).query).get("ToDate")
+    if to_date:
+        try:
+            if datetime.strptime(to_date[0], "%m/%d/%Y").year < datetime.now().year:
+                return IMMUTABLE
+        except ValueError:
+            pass
+    return REVALIDATE
+
+
+def hash_bytes(content):
+    return hashlib.sha256(content).hexdigest()
+
+
+def write_atomic(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    descriptor, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(descriptor, "wb") as temp_file:
+        temp_file.write(content)
+    os.replace(temp_path, path)
+
+
+class Page:
+    def __init__(self, cache, url, content_hash, content=None, from_cache=False):
+        self.cache = cache
+        self.url = url
+        self.content_hash = content_hash
+        self.from_cache = from_cache
+        self._content = content
+
+    @property
+    def content(self):
+        if self._content is None:
+            self._content = self.cache.read_body(self.content_hash)
+        return self._content
+
+
+class ResponseCache:
+    def __init__(self, directory=CACHE_DIR, enabled=CACHE_ENABLED, ttl=CACHE_TTL_SECONDS):
+        self.directory = directory
+        self.enabled = enabled
+        self.ttl = ttl
+        self.counters = Counter()
+
+    def entry_path(self, url):
+        return os.path.join(self.directory, "entries", hash_bytes(url.encode("utf-8")) + ".json")
+
+    def body_path(self, content_hash):
+        return os.path.join(self.directory, "bodies", content_hash[:2], content_hash)
+
+    def parsed_path(self, namespace, content_hash):
+        return os.path.join(self.directory, "parsed", namespace, content_hash[:2], content_hash + ".json")
+
+    def lookup(self, url):
+        if not self.enabled:
+            return None
+        try:
+            with open(self.entry_path(url), "r", encoding="utf-8") as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.body_path(entry["content_hash"])):
+            return None
+        return entry
+
+    def is_fresh(self, entry):
+        if entry["rule"] == IMMUTABLE:
+            return True
+        return self.ttl > 0 and time.time() - entry["validated_at"] < self.ttl
+
+    def conditional_headers(self, entry):
+        headers = {}
+        if entry and entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def read_body(self, content_hash):
+        with open(self.body_path(content_hash), "rb") as body_file:
+            return body_file.read()
+
+    def save_entry(self, url, content_hash, headers):
+        entry = {
+            "url": url,
+            "rule": freshness_rule(url),
+            "content_hash": content_hash,
+            "etag": headers.get("ETag"),
+            "last_modified": headers.get("Last-Modified"),
+            "validated_at": time.time()
+        }
+        write_atomic(self.entry_path(url), json.dumps(entry).encode("utf-8"))
+        return entry
+
+    def page_from_entry(self, entry):
+        return Page(self, entry["url"], entry["content_hash"], from_cache=True)
+
+    def fresh_page(self, url):
+        # Returns a page that can be served without touching the network (if any), along with the stored
+        # entry whose validators should be sent when the page has to be requested.
+        entry = self.lookup(url)
+        if entry and self.is_fresh(entry):
+            self.counters["hits"] += 1
+            return self.page_from_entry(entry), entry
+        return None, entry
+
+    def revalidated(self, entry, headers):
+        self.counters["revalidated"] += 1
+        merged_headers = {
+            "ETag": headers.get("ETag") or entry.get("etag"),
+            "Last-Modified": headers.get("Last-Modified") or entry.get("last_modified")
+        }
+        if self.enabled:
+            entry = self.save_entry(entry["url"], entry["content_hash"], merged_headers)
+        return self.page_from_entry(entry)
+
+    def store(self, url, content, headers):
+        self.counters["misses"] += 1
+        content_hash = hash_bytes(content)
+        if self.enabled:
+            body_path = self.body_path(content_hash)
+            if os.path.exists(body_path):
+                # Marks a shared body as in use, so a prune running meanwhile leaves it alone.
+                os.utime(body_path)
+            else:
+                write_atomic(body_path, content)
+            self.save_entry(url, content_hash, headers)
+        return Page(self, url, content_hash, content=content)
+
+    def parse(self, namespace, page, parser):
+        # Parsed results are keyed by the body's content hash, so an unchanged page (a hit or a 304) is not
+        # parsed again, and identical bodies served under different URLs share one result.
+        path = self.parsed_path(namespace, page.content_hash)
+        if self.enabled:
+            try:
+                with open(path, "r", encoding="utf-8") as parsed_file:
+                    result = json.load(parsed_file)
+                self.counters["parse_hits"] += 1
+                return result
+            except (OSError, ValueError):
+                pass
+
+        self.counters["parse_misses"] += 1
+        result = parser(page.content)
+        if self.enabled:
+            write_atomic(path, json.dumps(result).encode("utf-8"))
+        return result
+
+    def referenced_hashes(self):
+        hashes = set()
+        entries_dir = os.path.join(self.directory, "entries")
+        for name in os.listdir(entries_dir) if os.path.isdir(entries_dir) else []:
+            try:
+                with open(os.path.join(entries_dir, name), "r", encoding="utf-8") as entry_file:
+                    hashes.add(json.load(entry_file)["content_hash"])
+            except (OSError, ValueError, KeyError):
+                continue
+        return hashes
+
+    def prune(self):
+        # Deletes the bodies and parsed results that no entry refers to any more, i.e. earlier versions of pages
+        # that have changed since. Bodies are shared between URLs, so they are only dropped once unreferenced.
+        # Files touched after the prune started are kept, since a concurrent run may be about to refer to them.
+        if not self.enabled:
+            return 0
+
+        started = time.time()
+        referenced = self.referenced_hashes()
+        removed = 0
+        for root in (os.path.join(self.directory, "bodies"), os.path.join(self.directory, "parsed")):
+            for directory, _, names in os.walk(root):
+                for name in names:
+                    path = os.path.join(directory, name)
+                    if name.removesuffix(".json") in referenced:
+                        continue
+                    try:
+                        if os.path.getmtime(path) < started:
+                            os.remove(path)
+                            removed += 1
+                    except OSError:
+                        continue
+        return removed
+
+    def stats(self):
+        return dict(self.counters)
+
+    def reset_stats(self):
+        self.counters.clear()
+
+
+def merge_stats(*stats):
+    merged = Counter()
+    for entry in stats:
+        merged.update(entry)
+    return dict(merged)
+
+
+def format_stats(stats):
+    requests_served = stats.get("hits", 0) + stats.get("revalidated", 0) + stats.get("misses", 0)
+    parses = stats.get("parse_hits", 0) + stats.get("parse_misses", 0)
+    hit_rate = (stats.get("hits", 0) + stats.get("revalidated", 0)) / requests_served if requests_served else 0
+    parse_hit_rate = stats.get("parse_hits", 0) / parses if parses else 0
+    return (f"{requests_served} requests: {stats.get('hits', 0)} fresh hits, "
+            f"{stats.get('revalidated', 0)} revalidated, {stats.get('misses', 0)} misses "
+            f"({hit_rate:.1%} hit rate); {parses} parses: {parse_hit_rate:.1%} served from cache")
+
+
+response_cache = ResponseCache()
+
+
+def fetch_cached(url, cache=response_cache):
+    page, entry = cache.fresh_page(url)
+    if page:
+        return page
+
+    response = requests.get(url, headers=cache.conditional_headers(entry))
+    if response.status_code == 304 and entry:
+        return cache.revalidated(entry, response.headers)
+    response.raise_for_status()
+    return cache.store(url, response.content, response.headers)
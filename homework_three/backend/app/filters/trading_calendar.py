@@ -0,0 +1,113 @@
+import os
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+
+# A stretch of at least this many trading days without an entry for a symbol is treated as a hole to backfill;
+# shorter stretches are days on which the symbol simply did not trade.
+SCRAPE_HOLE_MIN_TRADING_DAYS = int(os.getenv("SCRAPE_HOLE_MIN_TRADING_DAYS", "10"))
+
+ONE_DAY = timedelta(days=1)
+
+
+def day(value):
+    return datetime(value.year, value.month, value.day)
+
+
+def trading_days(calendar, start, end):
+    # Stored trading days between start and end, inclusive. Outside the stored calendar (before the first or after
+    # the last stored date, e.g. today) every weekday is a potential trading day.
+    if start > end:
+        return []
+
+    if not calendar:
+        return weekdays(start, end)
+
+    days = calendar[bisect_left(calendar, start):bisect_right(calendar, end)]
+    if start < calendar[0]:
+        days = weekdays(start, min(end, calendar[0] - ONE_DAY)) + days
+    if end > calendar[-1]:
+        days = days + weekdays(max(start, calendar[-1] + ONE_DAY), end)
+    return days
+
+
+def weekdays(start, end):
+    days = []
+    current = start
+    while current <= end:
+        if current.weekday() < 5:
+            days.append(current)
+        current += ONE_DAY
+    return days
+
+
+def trading_days_between(calendar, first, last):
+    # Number of stored trading days strictly between two dates.
+    return max(0, bisect_left(calendar, last) - bisect_right(calendar, first))
+
+
+def coverage_from_dates(dates, calendar, scraped_through=None):
+    # Reconstructs the ranges a symbol was already scraped over from its stored dates: one range per run of entries,
+    # broken wherever the symbol is missing at least SCRAPE_HOLE_MIN_TRADING_DAYS trading days.
+    if not dates:
+        return []
+
+    ranges = []
+    start = previous = dates[0]
+    for date in dates[1:]:
+        if trading_days_between(calendar, previous, date) >= SCRAPE_HOLE_MIN_TRADING_DAYS:
+            ranges.append((start, previous))
+            start = date
+        previous = date
+    ranges.append((start, max(previous, scraped_through) if scraped_through else previous))
+    return ranges
+
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def missing_windows(coverage, end):
+    # The uncovered stretches from the start of the coverage up to `end`.
+    windows = []
+    cursor = coverage[0][0]
+    for start, stop in merge_ranges(coverage):
+        if start > cursor:
+            windows.append((cursor, start - ONE_DAY))
+        cursor = max(cursor, stop + ONE_DAY)
+    if cursor <= end:
+        windows.append((cursor, end))
+    return windows
+
+
+def trim_to_trading_days(windows, calendar):
+    trimmed = []
+    for start, end in windows:
+        days = trading_days(calendar, start, end)
+        if days:
+            trimmed.append((days[0], days[-1]))
+    return trimmed
+
+
+def request_windows(windows):
+    # Symbol history pages span at most one calendar year, so windows are split at year boundaries and every
+    # window of the same year is fetched with one request; re-reading covered days in between costs nothing extra.
+    by_year = {}
+    for start, end in windows:
+        for year in range(start.year, end.year + 1):
+            year_start = max(start, datetime(year, 1, 1))
+            year_end = min(end, datetime(year, 12, 31))
+            if year in by_year:
+                by_year[year] = (min(by_year[year][0], year_start), max(by_year[year][1], year_end))
+            else:
+                by_year[year] = (year_start, year_end)
+    return [by_year[year] for year in sorted(by_year)]
+
+
+def plan_windows(coverage, calendar, today):
+    return request_windows(trim_to_trading_days(missing_windows(coverage, day(today)), calendar))
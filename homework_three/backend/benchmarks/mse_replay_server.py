@@ -0,0 +1,243 @@
+import argparse
+import os
+import random
+import string
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+RECORDED_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded_pages")
+
+HISTORY_HEADERS = ["Date", "Last trade price", "Max", "Min", "Avg. Price", "%chg.", "Volume",
+                   "Turnover in BEST in denars", "Total turnover in denars"]
+
+NO_DATA_PAGE = b'<html><body><div class="col-md-12"><p>No data</p></div></body></html>'
+
+
+def issuer_symbols(count):
+    # Letter-only symbols, since filter one treats symbols with digits as invalid.
+    symbols = []
+    for index in range(count):
+        letters = ""
+        while True:
+            index, remainder = divmod(index, 26)
+            letters = string.ascii_uppercase[remainder] + letters
+            if index == 0:
+                break
+        symbols.append(f"SYM{letters:A>2}")
+    return symbols
+
+
+def bond_symbols(count):
+    return [f"RMDEN{index + 1:02d}" for index in range(count)]
+
+
+def format_number(value, decimals=2):
+    return f"{value:,.{decimals}f}"
+
+
+def history_page(symbol, date_from, date_to, today):
+    # One row per weekday in the window, newest first like the exchange's pages, with a random walk of prices
+    # seeded by the symbol and year, so a page is the same on every request.
+    rows = []
+    generator = random.Random(f"{symbol}:{date_from.year}")
+    price = generator.uniform(100, 10000)
+    date = date_from
+    while date <= min(date_to, today):
+        if date.weekday() < 5:
+            price = max(1.0, price * (1 + generator.gauss(0, 0.01)))
+            volume = generator.randint(0, 5000)
+            high = price * (1 + generator.random() * 0.01)
+            low = price * (1 - generator.random() * 0.01)
+            cells = [f"{date.month}/{date.day}/{date.year}", format_number(price), format_number(high),
+                     format_number(low), format_number((high + low) / 2), format_number(generator.gauss(0, 1)),
+                     format_number(volume, 0), format_number(volume * price), format_number(volume * price)]
+            rows.append("<tr>" + "".join(f"<td>{cell}</td>" for cell in cells) + "</tr>")
+        date += timedelta(days=1)
+
+    if not rows:
+        return NO_DATA_PAGE
+
+    header = "<tr>" + "".join(f"<th>{name}</th>" for name in HISTORY_HEADERS) + "</tr>"
+    return (f'<html><body><div class="container"><table id="resultsTable"><thead>{header}</thead>'
+            f'<tbody>{"".join(reversed(rows))}</tbody></table></div></body></html>').encode("utf-8")
+
+
+def dropdown_page(symbols):
+    options = "".join(f'<option value="{symbol}">{symbol}</option>' for symbol in symbols)
+    return f'<html><body><select id="Code"><option value="">Select</option>{options}</select></body></html>'.encode()
+
+
+def bonds_page(bonds):
+    rows = "".join(f'<tr><td>{index + 1}</td><td><a href="/en/issuers/bonds/{bond}">{bond}</a></td></tr>'
+                   for index, bond in enumerate(bonds))
+    return (f'<html><body><table id="bonds-table"><tr><th>#</th><th>Bond</th></tr>{rows}</table>'
+            f'</body></html>').encode()
+
+
+def bond_page(bond):
+    return f'<html><body><a href="/en/stats/symbolhistory/{bond}">Historical Data</a></body></html>'.encode()
+
+
+class ReplaySite:
+    # What the replay server answers: recorded pages where there are any (symbol history pages named
+    # SYMBOL_YEAR.html, issuers_dropdown.html and bonds.html in the recordings directory), generated ones otherwise.
+    # Only the first `history_years` years have data, so full-history scrapes end like they do on the exchange.
+    def __init__(self, issuers=20, bonds=5, history_years=12, recorded_dir=RECORDED_PAGES_DIR, today=None):
+        self.today = today or datetime.now()
+        self.first_year = self.today.year - history_years + 1
+        self.recorded_dir = recorded_dir
+        self.symbols = issuer_symbols(issuers)
+        self.bonds = bond_symbols(bonds)
+
+    def recorded(self, *parts):
+        path = os.path.join(self.recorded_dir, *parts)
+        if os.path.isfile(path):
+            with open(path, "rb") as page_file:
+                return page_file.read()
+        return None
+
+    def page(self, path, query):
+        parts = [part for part in path.split("/") if part]
+        if parts[:3] == ["en", "stats", "symbolhistory"] and "FromDate" in query:
+            symbol = parts[3]
+            date_from = datetime.strptime(query["FromDate"][0], "%m/%d/%Y")
+            date_to = datetime.strptime(query["ToDate"][0], "%m/%d/%Y")
+            if date_to.year < self.first_year:
+                return "history", NO_DATA_PAGE
+            if date_from.year == date_to.year:
+                recorded = self.recorded("symbol_history", f"{symbol}_{date_from.year}.html")
+                if recorded is not None:
+                    return "history", recorded
+            return "history", history_page(symbol, max(date_from, datetime(self.first_year, 1, 1)), date_to,
+                                           self.today)
+        if parts[:3] == ["en", "stats", "symbolhistory"]:
+            return "dropdown", self.recorded("issuers_dropdown.html") or dropdown_page(self.symbols + self.bonds)
+        if parts == ["en", "issuers", "bonds"]:
+            return "bonds", self.recorded("bonds.html") or bonds_page(self.bonds)
+        if parts[:3] == ["en", "issuers", "bonds"] and len(parts) == 4:
+            return "bond", bond_page(parts[3])
+        return None, None
+
+
+class ReplayStats:
+    def __init__(self):
+        self.counters = Counter()
+        self.lock = threading.Lock()
+
+    def record(self, kind, outcome, size=0):
+        with self.lock:
+            self.counters[f"{kind}_{outcome}"] += 1
+            self.counters["bytes"] += size
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters)
+
+    def reset_stats(self):
+        with self.lock:
+            self.counters.clear()
+
+
+class ReplayServer:
+    # A local stand-in for mse.mk. Every response waits `latency` seconds plus up to `jitter` more. History and
+    # bond detail pages, which the scraper fetches with retries, fail with `error_rate` probability: half of the
+    # failures answer 503 and half drop the connection without a response.
+    def __init__(self, site, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, seed=0):
+        self.site = site
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = ReplayStats()
+        self.httpd = ThreadingHTTPServer((host, port), self.handler_class())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def draw(self):
+        with self.random_lock:
+            return self.random.random(), self.random.random()
+
+    def handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                kind, content = server.site.page(url.path, parse_qs(url.query))
+                delay, failure = server.draw()
+                time.sleep(server.latency + server.jitter * delay)
+
+                if kind is None:
+                    server.stats.record("unknown", "404")
+                    self.respond(404, b"Not found")
+                elif kind in ("history", "bond") and failure < server.error_rate:
+                    if failure < server.error_rate / 2:
+                        server.stats.record(kind, "503")
+                        self.respond(503, b"Service unavailable")
+                    else:
+                        server.stats.record(kind, "dropped")
+                        self.close_connection = True
+                else:
+                    server.stats.record(kind, "200", len(content))
+                    self.respond(200, content)
+
+            def respond(self, status, content):
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="mse-replay", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve recorded or generated MSE pages locally.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--issuers", type=int, default=20, help="Generated issuers in the dropdown.")
+    parser.add_argument("--bonds", type=int, default=5, help="Generated bonds.")
+    parser.add_argument("--history-years", type=int, default=12, help="Years of history each issuer has.")
+    parser.add_argument("--latency-ms", type=float, default=0, help="Delay added to every response.")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Random extra delay of up to this much.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of history and bond pages that fail.")
+    parser.add_argument("--pages", default=RECORDED_PAGES_DIR, help="Directory of recorded pages.")
+    args = parser.parse_args()
+
+    site = ReplaySite(args.issuers, args.bonds, args.history_years, args.pages)
+    server = ReplayServer(site, port=args.port, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                          error_rate=args.error_rate)
+    print(f"Serving MSE pages on {server.base_url} (set SCRAPER_BASE_URL to use it).")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+from backend.benchmarks.mse_replay_server import RECORDED_PAGES_DIR, ReplayServer, ReplaySite
+
+# mongomock is optional; it backs the in-memory Mongo stand-in.
+try:
+    import mongomock
+except ImportError:
+    mongomock = None
+
+BENCHMARK_DATABASE = "mse_benchmark"
+
+# (name, width, format) of every reported column.
+COLUMNS = [
+    ("run", 5, "d"),
+    ("filter one s", 14, ".2f"),
+    ("filter three s", 16, ".2f"),
+    ("wall s", 9, ".2f"),
+    ("pages", 8, "d"),
+    ("pages/s", 10, ".1f"),
+    ("rows", 9, "d"),
+    ("rows/s", 10, ".0f"),
+    ("parse ms/page", 15, ".2f"),
+    ("format ms/page", 16, ".2f"),
+    ("write ms/page", 15, ".2f"),
+    ("retried", 9, "d"),
+]
+
+
+def configure_environment(args, base_url):
+    # The scraper and database modules read their settings when imported, and the filter three pool workers are
+    # spawned with this environment, so it is set before the pipeline is imported.
+    os.environ["SCRAPER_BASE_URL"] = base_url
+    os.environ["SCRAPER_CACHE_ENABLED"] = "0" if args.cache == "off" else "1"
+    os.environ["SCRAPER_BACKOFF_BASE_SECONDS"] = str(args.backoff)
+    os.environ["MONGO_DB"] = args.database
+    if args.mongo_host:
+        os.environ["MONGO_HOST"] = args.mongo_host
+    if args.mongo_port:
+        os.environ["MONGO_PORT"] = str(args.mongo_port)
+
+
+def use_cache_directory(directory):
+    from backend.app.filters.response_cache import response_cache
+
+    os.environ["SCRAPER_CACHE_DIR"] = directory
+    response_cache.directory = directory
+
+
+def reset_database(args):
+    from backend.database import setup_database
+    from backend.database.indexes import ensure_indexes
+
+    if args.mongo == "memory":
+        setup_database.client = mongomock.MongoClient()
+    else:
+        setup_database.get_client().drop_database(args.database)
+    ensure_indexes(setup_database.get_database())
+
+
+def stage_milliseconds(stats, stage):
+    items = stats.get(f"{stage}_items", 0)
+    return stats.get(f"{stage}_seconds", 0) / items * 1000 if items else 0
+
+
+def run_once(args, server, number):
+    from backend.app.filters.filter_one.filter_one_main import run_filter_one
+    from backend.app.filters.filter_three.filter_three_main import run_filter_three
+    from backend.app.filters.filter_two.ingest_pipeline import ingest_stats
+
+    reset_database(args)
+    server.stats.reset_stats()
+
+    started = time.perf_counter()
+    run_filter_one()
+    filter_one_done = time.perf_counter()
+    run_filter_three(workers=args.workers)
+    finished = time.perf_counter()
+
+    stats = ingest_stats.stats()
+    served = server.stats.stats()
+    filter_three_seconds = finished - filter_one_done
+    pages = stats.get("fetch_items", 0)
+    rows = stats.get("write_rows", 0)
+    return {
+        "run": number,
+        "filter one s": filter_one_done - started,
+        "filter three s": filter_three_seconds,
+        "wall s": finished - started,
+        "pages": pages,
+        "pages/s": pages / filter_three_seconds if filter_three_seconds else 0,
+        "rows": rows,
+        "rows/s": rows / filter_three_seconds if filter_three_seconds else 0,
+        "parse ms/page": stage_milliseconds(stats, "parse"),
+        "format ms/page": stage_milliseconds(stats, "format"),
+        "write ms/page": stage_milliseconds(stats, "write"),
+        "retried": sum(count for key, count in served.items() if key.endswith(("_503", "_dropped"))),
+    }
+
+
+def print_results(results):
+    print("".join(f"{name:>{width}}" for name, width, _ in COLUMNS))
+    for result in results:
+        print("".join(f"{result[name]:>{width}{spec}}" for name, width, spec in COLUMNS))
+
+    if len(results) > 1:
+        medians = []
+        for name, width, spec in COLUMNS[1:]:
+            median = statistics.median(result[name] for result in results)
+            medians.append(f"{round(median) if spec == 'd' else median:>{width}{spec}}")
+        print(f"{'med':>5}" + "".join(medians))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time filter one and filter three against a local MSE replay server and a scratch database."
+    )
+    parser.add_argument("--runs", type=int, default=3, help="Pipeline runs, each on an empty database.")
+    parser.add_argument("--workers", type=int, default=1, help="Filter three pool workers.")
+    parser.add_argument("--issuers", type=int, default=20, help="Generated issuers in the dropdown.")
+    parser.add_argument("--bonds", type=int, default=5, help="Generated bonds.")
+    parser.add_argument("--history-years", type=int, default=12, help="Years of history each issuer has.")
+    parser.add_argument("--latency-ms", type=float, default=20, help="Delay added to every response.")
+    parser.add_argument("--jitter-ms", type=float, default=10, help="Random extra delay of up to this much.")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of history and bond pages that fail.")
+    parser.add_argument("--backoff", type=float, default=0.05, help="Retry backoff base in seconds.")
+    parser.add_argument("--cache", choices=["cold", "warm", "off"], default="cold",
+                        help="cold: empty response cache per run; warm: runs share one cache; off: no cache.")
+    parser.add_argument("--pages", default=RECORDED_PAGES_DIR, help="Directory of recorded pages.")
+    parser.add_argument("--mongo", choices=["scratch", "memory"], default="scratch",
+                        help="scratch: a throwaway database on MONGO_HOST; memory: mongomock in this process.")
+    parser.add_argument("--mongo-host", help="Mongo host of the scratch database (defaults to MONGO_HOST).")
+    parser.add_argument("--mongo-port", type=int, help="Mongo port of the scratch database (defaults to MONGO_PORT).")
+    parser.add_argument("--database", default=BENCHMARK_DATABASE, help="Name of the scratch database.")
+    parser.add_argument("--keep-database", action="store_true", help="Keep the scratch database afterwards.")
+    args = parser.parse_args()
+
+    if args.mongo == "memory":
+        if mongomock is None:
+            print("The in-memory stand-in needs mongomock (pip install mongomock).")
+            return 1
+        if args.workers > 1:
+            # Spawned pool workers cannot see an in-process database.
+            print("The in-memory stand-in runs filter three without a process pool.")
+            args.workers = 1
+
+    site = ReplaySite(args.issuers, args.bonds, args.history_years, args.pages)
+    server = ReplayServer(site, latency=args.latency_ms / 1000, jitter=args.jitter_ms / 1000,
+                          error_rate=args.error_rate).start()
+    configure_environment(args, server.base_url)
+    cache_root = tempfile.mkdtemp(prefix="mse-benchmark-cache-")
+
+    print(f"Replaying {len(site.symbols)} issuers and {len(site.bonds)} bonds with {args.history_years} years of "
+          f"history from {server.base_url} ({args.latency_ms:.0f} ms + up to {args.jitter_ms:.0f} ms latency, "
+          f"{args.error_rate:.0%} errors), {args.mongo} database, {args.cache} cache, {args.workers} workers.")
+
+    results = []
+    try:
+        for number in range(1, args.runs + 1):
+            use_cache_directory(cache_root if args.cache == "warm" else os.path.join(cache_root, str(number)))
+            results.append(run_once(args, server, number))
+    finally:
+        server.stop()
+        shutil.rmtree(cache_root, ignore_errors=True)
+        if args.mongo == "scratch" and not args.keep_database:
+            from backend.database.setup_database import get_client
+
+            get_client().drop_database(args.database)
+
+    print()
+    print_results(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
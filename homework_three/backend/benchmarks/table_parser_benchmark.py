@@ -0,0 +1,96 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import requests
+
+from backend.app.filters.filter_two.filter_two_main import BASE_URL_TEMPLATE
+from backend.app.filters.filter_two.table_parser import extract_history_table
+from backend.tests.html_fixtures import SYNTHETIC_PAGES_DIR, legacy_extract_history_table, load_pages
+
+RECORDED_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recorded_pages", "symbol_history")
+
+
+def record_pages(symbols, years, directory):
+    os.makedirs(directory, exist_ok=True)
+    for symbol in symbols:
+        for year in years:
+            url = BASE_URL_TEMPLATE.format(symbol, f"1/1/{year}", f"12/31/{year}")
+            response = requests.get(url)
+            response.raise_for_status()
+            path = os.path.join(directory, f"{symbol}_{year}.html")
+            with open(path, "wb") as page_file:
+                page_file.write(response.content)
+            print(f"Recorded {url} -> {path}")
+
+
+def time_parser(parser, content, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        parser(content)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def check_compatibility(pages):
+    mismatches = []
+    for name, content in pages.items():
+        if legacy_extract_history_table(content) != extract_history_table(content):
+            mismatches.append(name)
+    return mismatches
+
+
+def run_benchmark(pages, repeat):
+    legacy_total = 0
+    lxml_total = 0
+
+    print(f"{'page':<32}{'rows':>8}{'bs4 ms':>12}{'lxml ms':>12}{'speedup':>10}")
+    for name, content in pages.items():
+        table = extract_history_table(content)
+        rows = len(table["columns"][0]) if table and table["columns"] else 0
+        legacy_time = time_parser(legacy_extract_history_table, content, repeat)
+        lxml_time = time_parser(extract_history_table, content, repeat)
+        legacy_total += legacy_time
+        lxml_total += lxml_time
+        print(f"{name:<32}{rows:>8}{legacy_time * 1000:>12.2f}{lxml_time * 1000:>12.2f}"
+              f"{legacy_time / lxml_time:>9.1f}x")
+
+    print(f"{'total':<32}{'':>8}{legacy_total * 1000:>12.2f}{lxml_total * 1000:>12.2f}"
+          f"{legacy_total / lxml_total:>9.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check the lxml history table parser against the BeautifulSoup extraction and time both."
+    )
+    parser.add_argument("--pages", default=RECORDED_PAGES_DIR, help="Directory of recorded symbol history pages.")
+    parser.add_argument("--repeat", type=int, default=20, help="Timed runs per page; the median is reported.")
+    parser.add_argument("--record", nargs="+", metavar="SYMBOL", help="Record pages for these symbols from mse.mk.")
+    parser.add_argument("--years", nargs="+", type=int, default=[2019, 2023], help="Years to record.")
+    args = parser.parse_args()
+
+    if args.record:
+        record_pages(args.record, args.years, args.pages)
+
+    if not os.path.isdir(args.pages) or not load_pages(args.pages):
+        print(f"No recorded pages in {args.pages}. Record some with --record SYMBOL, or pass --pages "
+              f"{SYNTHETIC_PAGES_DIR} to run on the synthetic test pages.")
+        return 1
+
+    pages = load_pages(args.pages)
+
+    mismatches = check_compatibility(pages)
+    if mismatches:
+        print(f"Parsers disagree on {len(mismatches)} of {len(pages)} pages: {', '.join(mismatches)}")
+        return 1
+    print(f"Parsers agree on all {len(pages)} pages.")
+
+    run_benchmark(pages, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
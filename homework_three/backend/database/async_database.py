@@ -0,0 +1,44 @@
+import asyncio
+import os
+from backend.database.setup_database import MONGO_URI, MONGO_DB, client_options, get_database
+
+# Motor is optional. Without it, or with MONGO_ASYNC_ENABLED=0, the async helpers run the blocking PyMongo calls in
+# worker threads instead.
+try:
+    from motor.motor_asyncio import AsyncIOMotorClient
+except ImportError:
+    AsyncIOMotorClient = None
+
+MONGO_ASYNC_ENABLED = os.getenv("MONGO_ASYNC_ENABLED", "1") == "1"
+
+async_client = None
+
+
+def async_enabled():
+    return MONGO_ASYNC_ENABLED and AsyncIOMotorClient is not None
+
+
+def get_async_database():
+    global async_client
+    if async_client is None:
+        async_client = AsyncIOMotorClient(MONGO_URI, **client_options())
+    return async_client[MONGO_DB]
+
+
+def close_async_client():
+    global async_client
+    if async_client is not None:
+        async_client.close()
+        async_client = None
+
+
+async def find_all(collection, query, projection=None):
+    if async_enabled():
+        return await get_async_database()[collection].find(query, projection).to_list(None)
+    return await asyncio.to_thread(lambda: list(get_database()[collection].find(query, projection)))
+
+
+async def find_one(collection, query, projection=None):
+    if async_enabled():
+        return await get_async_database()[collection].find_one(query, projection)
+    return await asyncio.to_thread(get_database()[collection].find_one, query, projection)
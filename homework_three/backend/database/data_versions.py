@@ -0,0 +1,47 @@
+import pymongo
+from backend.database.async_database import find_one
+
+# Counters bumped whenever stored data changes. The API runs in a different process than the pipeline, so the
+# counters live in Mongo and readers compare them against the version their cached results were built from. Besides
+# the global version every symbol has its own, which only moves when that symbol's entries are written.
+DATA_VERSIONS_COLLECTION = "data_versions"
+
+DATA_VERSION_ID = "data"
+
+
+def symbol_version_id(symbol):
+    return f"symbol:{symbol}"
+
+
+def bump_data_version(db, symbols=()):
+    if symbols:
+        db[DATA_VERSIONS_COLLECTION].bulk_write([
+            pymongo.UpdateOne({"_id": symbol_version_id(symbol)}, {"$inc": {"version": 1}}, upsert=True)
+            for symbol in symbols
+        ], ordered=False)
+
+    document = db[DATA_VERSIONS_COLLECTION].find_one_and_update(
+        {"_id": DATA_VERSION_ID},
+        {"$inc": {"version": 1}},
+        upsert=True,
+        return_document=True
+    )
+    return document["version"]
+
+
+def get_data_version(db):
+    document = db[DATA_VERSIONS_COLLECTION].find_one({"_id": DATA_VERSION_ID}, {"version": 1})
+    return document["version"] if document else 0
+
+
+async def get_data_version_async():
+    document = await find_one(DATA_VERSIONS_COLLECTION, {"_id": DATA_VERSION_ID}, {"version": 1})
+    return document["version"] if document else 0
+
+
+def get_symbol_versions(db, symbols):
+    versions = {symbol: 0 for symbol in symbols}
+    ids = {symbol_version_id(symbol): symbol for symbol in symbols}
+    for document in db[DATA_VERSIONS_COLLECTION].find({"_id": {"$in": list(ids)}}, {"version": 1}):
+        versions[ids[document["_id"]]] = document["version"]
+    return versions
@@ -0,0 +1,118 @@
+import os
+from datetime import datetime
+from bson.int64 import Int64
+
+# While existing collections are being migrated, responses keep the legacy string format the frontend was built
+# against and ingest also matches documents whose date is still a string. Set to 0 once the migration has run.
+DATA_ENTRIES_COMPAT_MODE = os.getenv("DATA_ENTRIES_COMPAT_MODE", "1") == "1"
+
+NUMERIC_COLUMNS = [
+    "last_trade_price",
+    "max",
+    "min",
+    "avg_price",
+    "pctchg",
+    "volume",
+    "turnover_in_best_in_denars",
+    "total_turnover_in_denars"
+]
+
+INTEGER_COLUMNS = {"volume"}
+
+# MSE lists turnovers in whole denars, so they go back to the legacy format without decimals unless they have any.
+WHOLE_NUMBER_COLUMNS = {"turnover_in_best_in_denars", "total_turnover_in_denars"}
+
+PRICE_DECIMALS = 2
+
+
+def parse_legacy_number(value, integer=False):
+    if value is None or isinstance(value, (int, float)):
+        if integer and value is not None:
+            return Int64(value)
+        return value
+
+    value_str = str(value).strip().replace('.', '').replace(',', '.')
+    if not value_str:
+        return None
+
+    try:
+        number = float(value_str)
+    except ValueError:
+        return None
+
+    if integer:
+        return Int64(round(number))
+    return number
+
+
+def format_legacy_number(value, integer=False, whole=False):
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return value
+
+    if integer or isinstance(value, int) or (whole and float(value).is_integer()):
+        english = f"{int(value):,}"
+    else:
+        english = f"{value:,.{PRICE_DECIMALS}f}"
+    return english.replace('.', '#').replace(',', '.').replace('#', ',')
+
+
+def parse_entry_date(value):
+    if isinstance(value, datetime):
+        return value
+    return datetime.strptime(value, "%Y-%m-%d")
+
+
+def format_entry_date(value):
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d")
+    return value
+
+
+def date_filter(value):
+    # Matches an entry's date both as a BSON date and, in compatibility mode, as a not yet migrated string.
+    value = parse_entry_date(value)
+    if DATA_ENTRIES_COMPAT_MODE:
+        return {"$in": [value, format_entry_date(value)]}
+    return value
+
+
+def date_type_filters(bounds=None):
+    # One query part per type dates are stored as. BSON sorts every string before every date, so a query spanning
+    # both is not in date order; each of these is, and their results are merged by date.
+    typed_bounds = {operator: parse_entry_date(value) for operator, value in (bounds or {}).items()}
+    filters = [{"date": {**typed_bounds, "$type": "date"}}]
+    if DATA_ENTRIES_COMPAT_MODE:
+        legacy_bounds = {operator: format_entry_date(value) for operator, value in typed_bounds.items()}
+        filters.append({"date": {**legacy_bounds, "$type": "string"}})
+    return filters
+
+
+def typed_fields(document):
+    fields = {}
+    if "date" in document:
+        fields["date"] = parse_entry_date(document["date"])
+    for column in NUMERIC_COLUMNS:
+        if column in document:
+            fields[column] = parse_legacy_number(document[column], integer=column in INTEGER_COLUMNS)
+    return fields
+
+
+def to_typed_entry(document):
+    document.update(typed_fields(document))
+    return document
+
+
+def to_response_entry(document, compat=DATA_ENTRIES_COMPAT_MODE):
+    if compat:
+        for column in NUMERIC_COLUMNS:
+            if column in document:
+                document[column] = format_legacy_number(document[column], integer=column in INTEGER_COLUMNS,
+                                                        whole=column in WHOLE_NUMBER_COLUMNS)
+    else:
+        to_typed_entry(document)
+
+    if "date" in document:
+        document["date"] = format_entry_date(document["date"])
+    return document
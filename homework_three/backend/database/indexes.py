@@ -0,0 +1,141 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pymongo.errors import OperationFailure
+from backend.database.setup_database import get_database
+
+REQUIRED_INDEXES = {
+    "issuers": [
+        {"keys": [("valid", 1)], "name": "valid_1"},
+        {"keys": [("symbol", 1)], "name": "symbol_1"},
+        {"keys": [("is_watched", 1)], "name": "watched_1"},
+    ],
+    "data_entries": [
+        # Serves the upsert filter, the latest-date lookup and per-symbol reads sorted by date.
+        {"keys": [("symbol", 1), ("date", 1)], "name": "symbol_1_date_1", "unique": True},
+    ],
+    "data_entries_buckets": [
+        {"keys": [("symbol", 1), ("year", 1)], "name": "symbol_1_year_1", "unique": True},
+    ],
+    "data_entries_weekly": [
+        {"keys": [("symbol", 1), ("date", 1)], "name": "symbol_1_date_1"},
+    ],
+    "data_entries_monthly": [
+        {"keys": [("symbol", 1), ("date", 1)], "name": "symbol_1_date_1"},
+    ],
+    "pipeline_jobs": [
+        # Serves the lookup for an active job of the same kind and the recent jobs listing.
+        {"keys": [("kind", 1), ("status", 1), ("created_at", -1)], "name": "kind_1_status_1_created_at_-1"},
+        {"keys": [("created_at", -1)], "name": "created_at_-1"},
+        # At most one queued or running job per kind, so racing triggers of separate processes cannot both insert one.
+        {"keys": [("kind", 1)], "name": "kind_1_active", "unique": True,
+         "partialFilterExpression": {"status": {"$in": ["queued", "running"]}}},
+    ],
+}
+
+# Indexes made redundant by the ones above. They are only dropped once their replacement exists.
+REDUNDANT_INDEXES = {
+    "data_entries": ["symbol_1", "date_1"],
+}
+
+DUPLICATE_KEY_ERROR = 11000
+
+
+class IndexBuildError(Exception):
+    pass
+
+
+def remove_duplicate_entries(db, dry_run=False):
+    # Keeps the newest entry (by _id) of every (symbol, date) and deletes the others, logging each one. It is only
+    # run by hand, as the migration that lets the unique index be built.
+    duplicates = db.data_entries.aggregate([
+        {"$group": {"_id": {"symbol": "$symbol", "date": "$date"}, "ids": {"$push": "$_id"}, "count": {"$sum": 1}}},
+        {"$match": {"count": {"$gt": 1}}}
+    ], allowDiskUse=True)
+
+    removed = 0
+    for duplicate in duplicates:
+        ids = sorted(duplicate["ids"])
+        print(f"{duplicate['_id']['symbol']} {duplicate['_id']['date']}: keeping {ids[-1]}, "
+              f"{'would remove' if dry_run else 'removing'} {', '.join(str(stale_id) for stale_id in ids[:-1])}")
+        if dry_run:
+            removed += len(ids) - 1
+        else:
+            removed += db.data_entries.delete_many({"_id": {"$in": ids[:-1]}}).deleted_count
+
+    print(f"{'Would remove' if dry_run else 'Removed'} {removed} duplicate data entries.")
+    return removed
+
+
+def create_index(db, collection, index):
+    options = {key: value for key, value in index.items() if key != "keys"}
+    try:
+        db[collection].create_index(index["keys"], **options)
+    except OperationFailure as e:
+        if e.code != DUPLICATE_KEY_ERROR:
+            raise
+        message = f"Cannot build the unique index {collection}.{index['name']}: {collection} holds duplicates."
+        if collection == "data_entries":
+            message += (" Review them with `python -m backend.database.indexes --remove-duplicate-entries --dry-run`"
+                        " and remove them by running it without --dry-run.")
+        raise IndexBuildError(message) from e
+
+
+def ensure_collection_indexes(db, collection):
+    existing = db[collection].index_information()
+    for index in REQUIRED_INDEXES[collection]:
+        if index["name"] not in existing:
+            print(f"Building index {collection}.{index['name']}")
+            create_index(db, collection, index)
+
+
+def ensure_indexes(db=None):
+    db = db if db is not None else get_database()
+
+    for collection in REQUIRED_INDEXES:
+        ensure_collection_indexes(db, collection)
+
+    for collection, names in REDUNDANT_INDEXES.items():
+        existing = db[collection].index_information()
+        for name in names:
+            if name in existing:
+                print(f"Dropping redundant index {collection}.{name}")
+                db[collection].drop_index(name)
+
+
+def ensure_indexes_in_background(db=None):
+    # The returned future raises the error of a failed build from result().
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ensure-indexes")
+    build = executor.submit(ensure_indexes, db)
+    executor.shutdown(wait=False)
+    return build
+
+
+def index_usage_stats(db=None):
+    db = db if db is not None else get_database()
+
+    stats = []
+    for collection in REQUIRED_INDEXES:
+        for index in db[collection].aggregate([{"$indexStats": {}}]):
+            stats.append({
+                "collection": collection,
+                "name": index["name"],
+                "key": dict(index["key"]),
+                "ops": index["accesses"]["ops"],
+                "since": index["accesses"]["since"]
+            })
+
+    return sorted(stats, key=lambda index: (index["collection"], -index["ops"]))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the required indexes.")
+    parser.add_argument("--remove-duplicate-entries", action="store_true",
+                        help="First delete all but the newest data entry of every (symbol, date).")
+    parser.add_argument("--dry-run", action="store_true", help="Only list the duplicates that would be removed.")
+    args = parser.parse_args()
+
+    database = get_database()
+    if args.remove_duplicate_entries:
+        remove_duplicate_entries(database, args.dry_run)
+    if not args.dry_run:
+        ensure_indexes(database)
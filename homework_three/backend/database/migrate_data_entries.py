@@ -0,0 +1,63 @@
+import argparse
+import os
+import pymongo
+from pymongo.errors import BulkWriteError
+from backend.database.setup_database import get_database
+from backend.database.entry_format import typed_fields
+from backend.database.indexes import DUPLICATE_KEY_ERROR
+
+MIGRATION_BATCH_SIZE = int(os.getenv("MIGRATION_BATCH_SIZE", "1000"))
+
+LEGACY_ENTRIES_QUERY = {"date": {"$type": "string"}}
+
+
+def migrate_data_entries(batch_size=MIGRATION_BATCH_SIZE, dry_run=False):
+    # Converts string-formatted entries in place, one _id-ordered batch at a time. Only documents whose date is
+    # still a string are selected, so an interrupted migration can simply be started again.
+    db = get_database()
+    collection = db.data_entries
+
+    remaining = collection.count_documents(LEGACY_ENTRIES_QUERY)
+    print(f"{remaining} data entries to migrate.")
+    if dry_run or not remaining:
+        return 0
+
+    migrated = 0
+    last_id = None
+    while True:
+        query = dict(LEGACY_ENTRIES_QUERY)
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+
+        batch = list(collection.find(query, sort=[("_id", 1)], limit=batch_size))
+        if not batch:
+            break
+
+        try:
+            collection.bulk_write([
+                pymongo.UpdateOne({"_id": document["_id"]}, {"$set": typed_fields(document)})
+                for document in batch
+            ], ordered=False)
+        except BulkWriteError as e:
+            # An entry that was re-scraped during the rollout already exists in typed form and the unique
+            # (symbol, date) index rejects the converted copy; the legacy document is then superseded.
+            superseded = [error["op"]["q"]["_id"] for error in e.details["writeErrors"]
+                          if error["code"] == DUPLICATE_KEY_ERROR]
+            if len(superseded) != len(e.details["writeErrors"]):
+                raise
+            collection.delete_many({"_id": {"$in": superseded}})
+
+        migrated += len(batch)
+        last_id = batch[-1]["_id"]
+        print(f"Migrated {migrated}/{remaining} data entries.")
+
+    return migrated
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert data_entries from locale strings to typed values.")
+    parser.add_argument("--batch-size", type=int, default=MIGRATION_BATCH_SIZE)
+    parser.add_argument("--dry-run", action="store_true", help="Only count the entries that need migrating.")
+    args = parser.parse_args()
+
+    migrate_data_entries(args.batch_size, args.dry_run)
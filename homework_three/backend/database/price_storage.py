@@ -0,0 +1,306 @@
+import heapq
+import os
+from collections import defaultdict
+from datetime import datetime
+from itertools import islice
+import pymongo
+from backend.database.entry_format import NUMERIC_COLUMNS, date_filter, date_type_filters, parse_entry_date, \
+    to_typed_entry
+
+# "documents" keeps one data_entries document per symbol and trading day. "buckets" keeps one
+# data_entries_buckets document per symbol and year, holding the year's entries as date-sorted column arrays.
+DATA_ENTRIES_STORAGE = os.getenv("DATA_ENTRIES_STORAGE", "documents")
+
+BUCKETS_COLLECTION = "data_entries_buckets"
+
+# Weekly and monthly bars, kept up to date by the pipeline (see backend/app/analytics/period_aggregates.py).
+PERIOD_COLLECTIONS = {
+    "week": "data_entries_weekly",
+    "month": "data_entries_monthly"
+}
+
+ENTRY_FIELDS = ["date", "symbol"] + NUMERIC_COLUMNS
+
+# Every date with at least one stored entry, one document of dates per year, extended as entries are written.
+CALENDAR_COLLECTION = "trading_calendar"
+CALENDAR_BUILT_ID = "built"
+
+
+def buckets_enabled():
+    return DATA_ENTRIES_STORAGE == "buckets"
+
+
+def bucket_id(symbol, year):
+    return f"{symbol}:{year}"
+
+
+def build_bucket(symbol, year, entries_by_date):
+    dates = sorted(entries_by_date)
+    columns = {"date": dates}
+    for column in NUMERIC_COLUMNS:
+        columns[column] = [entries_by_date[date].get(column) for date in dates]
+
+    return {
+        "_id": bucket_id(symbol, year),
+        "symbol": symbol,
+        "year": year,
+        "count": len(dates),
+        "min_date": dates[0],
+        "max_date": dates[-1],
+        "columns": columns
+    }
+
+
+def bucket_entries(bucket):
+    columns = bucket["columns"]
+    for index, date in enumerate(columns["date"]):
+        entry = {"date": date, "symbol": bucket["symbol"]}
+        for column in NUMERIC_COLUMNS:
+            values = columns.get(column)
+            entry[column] = values[index] if values else None
+        yield entry
+
+
+def write_bucket_entries(db, symbol, records):
+    records_by_year = defaultdict(list)
+    for record in records:
+        records_by_year[parse_entry_date(record["date"]).year].append(record)
+
+    existing = {
+        bucket["year"]: bucket
+        for bucket in db[BUCKETS_COLLECTION].find({"_id": {"$in": [bucket_id(symbol, year) for year in records_by_year]}})
+    }
+
+    operations = []
+    for year, year_records in records_by_year.items():
+        entries_by_date = {}
+        if year in existing:
+            entries_by_date = {entry["date"]: entry for entry in bucket_entries(existing[year])}
+        for record in year_records:
+            entry = dict(record)
+            entry["date"] = parse_entry_date(entry["date"])
+            entries_by_date[entry["date"]] = {**entries_by_date.get(entry["date"], {}), **entry}
+
+        bucket = build_bucket(symbol, year, entries_by_date)
+        operations.append(pymongo.ReplaceOne({"_id": bucket["_id"]}, bucket, upsert=True))
+
+    if operations:
+        db[BUCKETS_COLLECTION].bulk_write(operations)
+
+
+def record_trading_days(db, dates):
+    days_by_year = defaultdict(set)
+    for date in dates:
+        date = parse_entry_date(date)
+        days_by_year[date.year].add(date)
+
+    operations = [
+        pymongo.UpdateOne({"_id": year}, {"$addToSet": {"dates": {"$each": sorted(days)}}}, upsert=True)
+        for year, days in days_by_year.items()
+    ]
+    if operations:
+        db[CALENDAR_COLLECTION].bulk_write(operations, ordered=False)
+
+
+def write_entry_batch(db, records):
+    # Writes entries of any number of symbols; in documents mode as one unordered bulk write.
+    record_trading_days(db, (record["date"] for record in records))
+
+    if buckets_enabled():
+        records_by_symbol = defaultdict(list)
+        for record in records:
+            records_by_symbol[record["symbol"]].append(record)
+        for symbol, symbol_records in records_by_symbol.items():
+            write_bucket_entries(db, symbol, symbol_records)
+        return
+
+    bulk_operations = [
+        pymongo.UpdateOne(
+            {"symbol": record["symbol"], "date": date_filter(record["date"])},
+            {"$set": record},
+            upsert=True
+        )
+        for record in records
+    ]
+
+    if bulk_operations:
+        db.data_entries.bulk_write(bulk_operations, ordered=False)
+
+
+def date_bounds(date_from=None, date_to=None, after=None):
+    bounds = {}
+    if date_from is not None:
+        bounds["$gte"] = parse_entry_date(date_from)
+    if after is not None:
+        bounds["$gt"] = parse_entry_date(after)
+    if date_to is not None:
+        bounds["$lte"] = parse_entry_date(date_to)
+    return bounds
+
+
+def bucket_query(symbol, bounds):
+    query = {"symbol": symbol}
+    years = {}
+    lower = max((bounds[operator] for operator in ("$gte", "$gt") if operator in bounds), default=None)
+    if lower is not None:
+        years["$gte"] = lower.year
+    if "$lte" in bounds:
+        years["$lte"] = bounds["$lte"].year
+    if years:
+        query["year"] = years
+    return query
+
+
+def in_bounds(date, bounds):
+    return ("$gte" not in bounds or date >= bounds["$gte"]) and ("$gt" not in bounds or date > bounds["$gt"]) \
+        and ("$lte" not in bounds or date <= bounds["$lte"])
+
+
+def find_bucket_entries(db, symbol, fields, bounds, limit=None):
+    found = 0
+    for bucket in db[BUCKETS_COLLECTION].find(bucket_query(symbol, bounds), sort=[("year", 1)]):
+        for entry in bucket_entries(bucket):
+            if limit is not None and found >= limit:
+                return
+            if in_bounds(entry["date"], bounds):
+                found += 1
+                yield {field: entry.get(field) for field in fields}
+
+
+def find_entries(db, symbol, fields=ENTRY_FIELDS, date_from=None, date_to=None, after=None, limit=None,
+                 batch_size=None):
+    # Entries come in date order; `after` is an exclusive lower bound, so the last date of a page is the cursor
+    # for the next one. Both walk the unique (symbol, date) index. In compatibility mode string and BSON dates
+    # are read by separate cursors merged by date, since a single sort puts every string date first.
+    bounds = date_bounds(date_from, date_to, after)
+
+    if buckets_enabled():
+        yield from find_bucket_entries(db, symbol, fields, bounds, limit)
+        return
+
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+    cursors = [
+        db.data_entries.find({"symbol": symbol, **date_query}, projection, sort=[("date", 1)], limit=limit or 0,
+                             batch_size=batch_size or 0)
+        for date_query in date_type_filters(bounds)
+    ]
+    if len(cursors) == 1:
+        yield from cursors[0]
+        return
+
+    entries = heapq.merge(*cursors, key=lambda entry: parse_entry_date(entry["date"]))
+    yield from islice(entries, limit) if limit else entries
+
+
+def find_entries_for_symbols(db, symbols, fields=ENTRY_FIELDS):
+    # Loads several symbols with a single query, grouped by symbol.
+    entries = {symbol: [] for symbol in symbols}
+
+    if buckets_enabled():
+        for bucket in db[BUCKETS_COLLECTION].find({"symbol": {"$in": list(symbols)}}, sort=[("symbol", 1), ("year", 1)]):
+            entries[bucket["symbol"]].extend(
+                {field: entry.get(field) for field in fields} for entry in bucket_entries(bucket)
+            )
+        return entries
+
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+    projection["symbol"] = 1
+    for entry in db.data_entries.find({"symbol": {"$in": list(symbols)}}, projection):
+        entries[entry["symbol"]].append(entry)
+    return entries
+
+
+def latest_entry_date(db, symbol, before=None):
+    if buckets_enabled():
+        if before is None:
+            bucket = db[BUCKETS_COLLECTION].find_one({"symbol": symbol}, sort=[("year", -1)],
+                                                     projection={"max_date": 1})
+            return bucket["max_date"] if bucket else None
+
+        before = parse_entry_date(before)
+        for bucket in db[BUCKETS_COLLECTION].find({"symbol": symbol, "year": {"$lte": before.year}},
+                                                  sort=[("year", -1)], projection={"columns.date": 1}):
+            earlier = [date for date in bucket["columns"]["date"] if date < before]
+            if earlier:
+                return earlier[-1]
+        return None
+
+    latest = [
+        result["date"]
+        for date_query in date_type_filters({"$lt": before} if before is not None else None)
+        if (result := db.data_entries.find_one({"symbol": symbol, **date_query}, sort=[("date", -1)],
+                                               projection={"date": 1}))
+    ]
+    return max(latest, key=parse_entry_date, default=None)
+
+
+def stored_dates_by_symbol(db, symbols):
+    # The sorted stored dates of several symbols, gathered by one aggregation.
+    if not symbols:
+        return {}
+
+    collection, dates_field = (db[BUCKETS_COLLECTION], "$columns.date") if buckets_enabled() \
+        else (db.data_entries, "$date")
+    pipeline = [
+        {"$match": {"symbol": {"$in": list(symbols)}}},
+        {"$group": {"_id": "$symbol", "dates": {"$push": dates_field}}}
+    ]
+
+    dates = {}
+    for group in collection.aggregate(pipeline, allowDiskUse=True):
+        values = [date for bucket_dates in group["dates"] for date in bucket_dates] if buckets_enabled() \
+            else group["dates"]
+        dates[group["_id"]] = sorted(parse_entry_date(date) for date in values)
+    return dates
+
+
+def distinct_entry_dates(db):
+    # Every date on which at least one symbol has an entry, i.e. the exchange's trading days as far as stored. It is
+    # read from trading_calendar, which entry writes keep extending; the entries are only scanned to build it once.
+    calendar = db[CALENDAR_COLLECTION]
+    if calendar.find_one({"_id": CALENDAR_BUILT_ID}) is None:
+        if buckets_enabled():
+            record_trading_days(db, db[BUCKETS_COLLECTION].distinct("columns.date"))
+        else:
+            record_trading_days(db, db.data_entries.distinct("date"))
+        calendar.update_one({"_id": CALENDAR_BUILT_ID}, {"$set": {"built_at": datetime.now()}}, upsert=True)
+
+    dates = set()
+    for year in calendar.find({"dates": {"$exists": True}}):
+        dates.update(year["dates"])
+    return sorted(dates)
+
+
+def stored_symbols(db):
+    if buckets_enabled():
+        return db[BUCKETS_COLLECTION].distinct("symbol")
+    return db.data_entries.distinct("symbol")
+
+
+def find_period_bars(db, symbol, timeframe, fields=ENTRY_FIELDS, date_from=None, date_to=None, after=None,
+                     limit=None, batch_size=None):
+    query = {"symbol": symbol}
+    bounds = date_bounds(date_from, date_to, after)
+    if bounds:
+        query["date"] = bounds
+
+    projection = {field: 1 for field in fields}
+    projection["_id"] = 0
+    return db[PERIOD_COLLECTIONS[timeframe]].find(query, projection, sort=[("date", 1)], limit=limit or 0,
+                                                  batch_size=batch_size or 0)
+
+
+def rebuild_buckets(db):
+    symbols = db.data_entries.distinct("symbol")
+    for position, symbol in enumerate(symbols, start=1):
+        entries = [to_typed_entry(entry) for entry in db.data_entries.find({"symbol": symbol}, {"_id": 0})]
+        write_bucket_entries(db, symbol, entries)
+        print(f"Rebuilt buckets for {symbol} ({position}/{len(symbols)}, {len(entries)} entries).")
+
+
+if __name__ == "__main__":
+    from backend.database.setup_database import get_database
+
+    rebuild_buckets(get_database())
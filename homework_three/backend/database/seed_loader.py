@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import time
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from backend.database.entry_format import to_typed_entry
+from backend.database.indexes import DUPLICATE_KEY_ERROR
+from backend.database.price_storage import BUCKETS_COLLECTION, buckets_enabled, record_trading_days, \
+    write_bucket_entries
+
+# orjson is optional; without it the seed is parsed with the json module.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SEED_FILE = os.getenv("SEED_DATA_FILE", "/app/backend/database/data_entries.json")
+SEED_BATCH_SIZE = int(os.getenv("SEED_BATCH_SIZE", "5000"))
+SEED_WORKERS = int(os.getenv("SEED_WORKERS", "4"))
+
+# Progress is kept per target collection, named by the state document's _id.
+SEED_STATE_COLLECTION = "seed_state"
+
+
+def loads(line):
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def parse_document(line):
+    document = loads(line)
+    if isinstance(document.get("_id"), dict) and "$oid" in document["_id"]:
+        document["_id"] = ObjectId(document["_id"]["$oid"])
+    return to_typed_entry(document)
+
+
+def read_batches(seed_file, offset, batch_size):
+    # Yields (start offset, end offset, lines) of consecutive batches of lines, reading the file as it goes.
+    seed_file.seek(offset)
+    start = offset
+    lines = []
+    for line in iter(seed_file.readline, b""):
+        if line.strip():
+            lines.append(line)
+        if len(lines) >= batch_size:
+            end = seed_file.tell()
+            yield start, end, lines
+            start = end
+            lines = []
+    if lines:
+        yield start, seed_file.tell(), lines
+
+
+def insert_batch(db, lines):
+    documents = [parse_document(line) for line in lines]
+    record_trading_days(db, (document["date"] for document in documents))
+
+    if buckets_enabled():
+        documents_by_symbol = defaultdict(list)
+        for document in documents:
+            documents_by_symbol[document["symbol"]].append(document)
+        for symbol, entries in documents_by_symbol.items():
+            write_bucket_entries(db, symbol, entries)
+        return len(documents)
+
+    try:
+        db.data_entries.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        # Entries of a batch that was being inserted when an earlier load stopped are already stored.
+        if any(error["code"] != DUPLICATE_KEY_ERROR for error in e.details["writeErrors"]):
+            raise
+    return len(documents)
+
+
+def seed_target():
+    return BUCKETS_COLLECTION if buckets_enabled() else "data_entries"
+
+
+def seed_state(db, target=None):
+    return db[SEED_STATE_COLLECTION].find_one({"_id": target or seed_target()}) or {}
+
+
+def seed_interrupted(db):
+    state = seed_state(db)
+    return bool(state) and not state.get("complete")
+
+
+def reset_seed_state(db, target):
+    # For a newly created target collection, whose earlier progress, if any, went with the collection.
+    db[SEED_STATE_COLLECTION].delete_one({"_id": target})
+
+
+def save_seed_state(db, target, state):
+    db[SEED_STATE_COLLECTION].update_one({"_id": target}, {"$set": state}, upsert=True)
+
+
+def advance(db, target, pending, state):
+    # Batches finish out of order; the saved offset only moves past batches that finished along with all before them.
+    advanced = False
+    while pending:
+        start = next(iter(pending))
+        end, future = pending[start]
+        if not future.done():
+            break
+        state["entries"] += future.result()
+        state["offset"] = end
+        del pending[start]
+        advanced = True
+
+    if advanced:
+        save_seed_state(db, target, state)
+    return advanced
+
+
+def load_seed_entries(db, path=SEED_FILE, batch_size=SEED_BATCH_SIZE, workers=SEED_WORKERS):
+    # Streams the seed file into data_entries (or its buckets) in unordered batches inserted by a pool of threads, so
+    # only the batches in flight are held in memory. The byte offset up to which every batch is stored is kept in
+    # seed_state, and an interrupted load continues from there; documents keep their _id from the file, so a batch
+    # inserted twice only yields duplicate key errors. Indexes are left to ensure_indexes, to be built once the
+    # entries are in.
+    file_size = os.path.getsize(path)
+    target = seed_target()
+    state = seed_state(db, target)
+    if state.get("complete") and state.get("file_size") == file_size:
+        print(f"Seed data already loaded ({state['entries']} entries).")
+        return 0
+
+    if state.get("file_size") != file_size:
+        state = {}
+    state = {"offset": state.get("offset", 0), "entries": state.get("entries", 0), "file_size": file_size,
+             "complete": False}
+    if state["offset"]:
+        print(f"Resuming seed load at {state['offset'] / file_size:.0%} ({state['entries']} entries loaded).")
+
+    # Bucket writes read and rewrite a symbol's whole year, so they are not spread over threads.
+    workers = 1 if buckets_enabled() else workers
+    pending = OrderedDict()
+    loaded_before = state["entries"]
+    started = time.monotonic()
+
+    def report_progress():
+        if advance(db, target, pending, state):
+            rate = (state["entries"] - loaded_before) / max(time.monotonic() - started, 1e-9)
+            print(f"Seeded {state['entries']} entries ({state['offset'] / file_size:.0%}, {rate:.0f} entries/s).")
+
+    with open(path, "rb") as seed_file, ThreadPoolExecutor(max_workers=workers) as executor:
+        for start, end, lines in read_batches(seed_file, state["offset"], batch_size):
+            pending[start] = (end, executor.submit(insert_batch, db, lines))
+            # At most two batches per thread are read ahead of the oldest unfinished one.
+            while len(pending) >= workers * 2:
+                wait([pending[next(iter(pending))][1]])
+                report_progress()
+            report_progress()
+
+        wait([future for _, future in pending.values()])
+        report_progress()
+
+    state["complete"] = True
+    save_seed_state(db, target, state)
+    print(f"Inserted {state['entries'] - loaded_before} seed entries in {time.monotonic() - started:.1f}s "
+          f"({state['entries']} in total).")
+    return state["entries"] - loaded_before
+
+
+if __name__ == "__main__":
+    from backend.database.setup_database import get_database
+    from backend.database.indexes import ensure_indexes
+
+    parser = argparse.ArgumentParser(description="Load the pre-scraped data_entries seed file.")
+    parser.add_argument("--path", default=SEED_FILE)
+    parser.add_argument("--batch-size", type=int, default=SEED_BATCH_SIZE)
+    parser.add_argument("--workers", type=int, default=SEED_WORKERS)
+    args = parser.parse_args()
+
+    database = get_database()
+    load_seed_entries(database, args.path, args.batch_size, args.workers)
+    ensure_indexes(database)
@@ -1,29 +1,102 @@
+import os
+import threading
 import pymongo
-import json
-from bson import ObjectId
+from backend.database.price_storage import BUCKETS_COLLECTION, CALENDAR_COLLECTION, PERIOD_COLLECTIONS, \
+    buckets_enabled
+
+
+MONGO_HOST = os.getenv("MONGO_HOST", "mongo")
+MONGO_PORT = int(os.getenv("MONGO_PORT", "27017"))
+MONGO_DB = os.getenv("MONGO_DB", "mse_data")
+MONGO_URI = f"mongodb://{MONGO_HOST}:{MONGO_PORT}/"
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "10000"))
+# 0 leaves socket reads without a timeout, which long index builds and migrations rely on.
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "0"))
+
+client = None
+client_lock = threading.Lock()
+
+
+def client_options():
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "connectTimeoutMS": MONGO_CONNECT_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "socketTimeoutMS": MONGO_SOCKET_TIMEOUT_MS or None
+    }
+
+
+def get_client():
+    # One client, and so one connection pool, per process. It is thread-safe and connects on first use, so modules
+    # can ask for it freely. Pipeline pool workers are spawned and build their own.
+    global client
+    if client is None:
+        with client_lock:
+            if client is None:
+                client = pymongo.MongoClient(MONGO_URI, connect=False, **client_options())
+    return client
 
 
 def get_database():
-    client = pymongo.MongoClient("mongodb://mongo:27017/")
-    return client['mse_data']
+    return get_client()[MONGO_DB]
+
+
+def close_client():
+    global client
+    with client_lock:
+        if client is not None:
+            client.close()
+            client = None
 
 
 def setup_collections():
+    # Imported here, since the seed loader builds on the index definitions, which use this module.
+    from backend.database.seed_loader import load_seed_entries, reset_seed_state, seed_interrupted
+
     db = get_database()
 
     if "issuers" not in db.list_collection_names():
         db.create_collection("issuers", capped=False)
 
+    # The seed is loaded into a newly created collection, or again if its last load was interrupted.
+    seed = seed_interrupted(db)
+
     if "data_entries" not in db.list_collection_names():
         db.create_collection("data_entries", capped=False)
-        insert_pre_scraped_data()
+        reset_seed_state(db, "data_entries")
+        seed = seed or not buckets_enabled()
+
+    if buckets_enabled() and BUCKETS_COLLECTION not in db.list_collection_names():
+        db.create_collection(BUCKETS_COLLECTION, capped=False)
+        reset_seed_state(db, BUCKETS_COLLECTION)
+        seed = True
+
+    if seed:
+        load_seed_entries(db)
+
+    for collection in PERIOD_COLLECTIONS.values():
+        if collection not in db.list_collection_names():
+            db.create_collection(collection, capped=False)
+
+    if CALENDAR_COLLECTION not in db.list_collection_names():
+        db.create_collection(CALENDAR_COLLECTION, capped=False)
 
     if "scrapings" not in db.list_collection_names():
         db.create_collection("scrapings", capped=False)
 
+    if "bond_symbols" not in db.list_collection_names():
+        db.create_collection("bond_symbols", capped=False)
+
     if "app_status" not in db.list_collection_names():
         db.create_collection("app_status", capped=False)
 
+    if "pipeline_jobs" not in db.list_collection_names():
+        db.create_collection("pipeline_jobs", capped=False)
+
     if "reports" not in db.list_collection_names():
         db.create_collection("reports", capped=False)
 
@@ -32,25 +105,3 @@ def setup_collections():
 
     if "personalization_strategies" not in db.list_collection_names():
         db.create_collection("personalization_strategies", capped=False)
-
-
-def convert_oid(data):
-    if isinstance(data, list):
-        for doc in data:
-            if "_id" in doc and isinstance(doc["_id"], dict) and "$oid" in doc["_id"]:
-                doc["_id"] = ObjectId(doc["_id"]["$oid"])
-    return data
-
-
-def insert_pre_scraped_data():
-    db = get_database()
-    collection = db["data_entries"]
-    with open('/app/backend/database/data_entries.json', 'r', encoding='utf-8') as json_file:
-        data = [json.loads(line) for line in json_file]
-        data = convert_oid(data)
-
-    try:
-        result = collection.insert_many(data)
-        print(f"Inserted {len(result.inserted_ids)} documents into the collection.")
-    except pymongo.errors.BulkWriteError as e:
-        print("Error inserting documents:", e.details)
\ No newline at end of file
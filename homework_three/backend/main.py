@@ -1,8 +1,25 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from backend.api.endpoints import api_router
+from backend.database.setup_database import close_client, get_client
+from backend.database.async_database import close_async_client
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Warms up the shared connection pool; the API still starts while Mongo is coming up, since the pipeline
+    # container and Mongo start together.
+    try:
+        get_client().admin.command("ping")
+    except Exception as e:
+        print(f"Mongo is not reachable yet: {e}")
+    yield
+    close_async_client()
+    close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -0,0 +1,45 @@
+import os
+
+from bs4 import BeautifulSoup
+
+from backend.app.filters.filter_two.table_parser import normalize_header
+
+# Symbol history pages written by hand after the mse.mk layout, including the page chrome, the first col-md-12 div
+# and padded cells. They are not captures of the live site, which could not be reached when they were made; pages
+# recorded with the table parser benchmark should replace them.
+SYNTHETIC_PAGES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "synthetic_pages")
+
+
+def legacy_extract_history_table(content):
+    # The BeautifulSoup html.parser extraction that scrape_data_for_issuer used before the lxml parser,
+    # kept as the reference implementation for the compatibility check.
+    soup = BeautifulSoup(content, 'html.parser')
+
+    no_data_div = soup.find('div', class_='col-md-12')
+    if no_data_div and "No data" in no_data_div.get_text():
+        return None
+
+    table = soup.find('table')
+    if not table:
+        return None
+
+    headers = [normalize_header(th.get_text(strip=True)) for th in table.find_all('th')]
+
+    rows = []
+    for row in table.find_all('tr')[1:]:
+        cells = row.find_all('td')
+        if len(cells) != len(headers):
+            continue
+        rows.append([cell.get_text(strip=True) for cell in cells])
+
+    columns = [list(column) for column in zip(*rows)] if rows else [[] for _ in headers]
+    return {"headers": headers, "columns": columns}
+
+
+def load_pages(directory):
+    pages = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith(".html"):
+            with open(os.path.join(directory, name), "rb") as page_file:
+                pages[name] = page_file.read()
+    return pages
@@ -0,0 +1,41 @@
+import unittest
+
+from backend.database.entry_format import format_legacy_number, parse_legacy_number, to_response_entry, \
+    to_typed_entry
+
+LEGACY_ENTRY = {
+    "date": "2023-12-29",
+    "last_trade_price": "21.900,00",
+    "max": "22.000,50",
+    "min": "21.450,50",
+    "avg_price": "21.789,34",
+    "pctchg": "0,00",
+    "volume": "1.250",
+    "turnover_in_best_in_denars": "1.234.567",
+    "total_turnover_in_denars": "27.236.675"
+}
+
+
+class LegacyNumberTest(unittest.TestCase):
+    def test_prices_round_trip(self):
+        for value in ["21.900,00", "1.450,50", "0,00", "-1,23", "999,99"]:
+            with self.subTest(value=value):
+                self.assertEqual(format_legacy_number(parse_legacy_number(value)), value)
+
+    def test_integers_round_trip(self):
+        for value in ["1.250", "0", "1.234.567"]:
+            with self.subTest(value=value):
+                self.assertEqual(format_legacy_number(parse_legacy_number(value, integer=True), integer=True), value)
+
+    def test_whole_numbers_round_trip(self):
+        for value in ["1.234.567", "0", "1.234.567,50"]:
+            with self.subTest(value=value):
+                self.assertEqual(format_legacy_number(parse_legacy_number(value), whole=True), value)
+
+    def test_entry_round_trip(self):
+        typed = to_typed_entry(dict(LEGACY_ENTRY))
+        self.assertEqual(to_response_entry(typed, compat=True), LEGACY_ENTRY)
+
+
+if __name__ == "__main__":
+    unittest.main()
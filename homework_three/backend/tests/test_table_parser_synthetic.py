@@ -0,0 +1,32 @@
+import unittest
+
+from backend.app.filters.filter_two.table_parser import extract_history_table
+from backend.tests.html_fixtures import SYNTHETIC_PAGES_DIR, legacy_extract_history_table, load_pages
+
+
+class SyntheticPageTableParserTest(unittest.TestCase):
+    # Runs on synthetic pages, not captures of mse.mk, so it only shows that both extractions agree on the layout as
+    # it was reproduced. The pages cover a full year of trading, a year with many untraded days, a "No data" year and
+    # a page without a results table.
+    def setUp(self):
+        self.pages = load_pages(SYNTHETIC_PAGES_DIR)
+
+    def test_matches_legacy_extraction(self):
+        self.assertTrue(self.pages)
+        for name, content in self.pages.items():
+            with self.subTest(page=name):
+                self.assertEqual(extract_history_table(content), legacy_extract_history_table(content))
+
+    def test_reads_every_trading_day(self):
+        table = extract_history_table(self.pages["KMB_2023.html"])
+        self.assertEqual(table["headers"][:2], ["date", "last_trade_price"])
+        self.assertEqual(len(table["columns"][0]), 260)
+        self.assertEqual(table["columns"][0][0], "12/29/2023")
+
+    def test_pages_without_data(self):
+        self.assertIsNone(extract_history_table(self.pages["ALK_1996.html"]))
+        self.assertIsNone(extract_history_table(self.pages["STB_2010.html"]))
+
+
+if __name__ == "__main__":
+    unittest.main()
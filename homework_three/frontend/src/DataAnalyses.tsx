@@ -5,12 +5,11 @@ import "./assets/css/DataAnalyses.css";
 import {
     ApiResponse,
     ProcessedDataEntry,
-    processData
+    parseEntries
 } from "./dataCleaning";
 import { calculateIndicator } from "./indicators";
 import IndicatorChart from "./IndicatorChart";
 import { getIndicatorParams, TimeFrame } from "./indicatorConfig";
-import { aggregateWeekly, aggregateMonthly } from "./dataAggregation";
 
 import Modal from './Modal';
 
@@ -217,6 +216,10 @@ const DataAnalyses: React.FC = () => {
         if (symbolTwo && symbolTwo !== "None") {
             url += `&symbolTwo=${encodeURIComponent(symbolTwo)}`;
         }
+        url += `&timeframe=${type}`;
+        if (type === "day") {
+            url += "&fill=true";
+        }
 
         console.log(`Fetching data for indicator ${id} from URL: ${url}`);
 
@@ -227,30 +230,11 @@ const DataAnalyses: React.FC = () => {
             }
             const apiResponse: ApiResponse = await resp.json();
 
-            const processedData = processData(apiResponse.data);
-            let processedDataTwo: ProcessedDataEntry[] = [];
-            if (apiResponse.dataTwo) {
-                processedDataTwo = processData(apiResponse.dataTwo);
-            }
-
-            let aggregatedDataOne: ProcessedDataEntry[];
-            if (type === "week") {
-                aggregatedDataOne = aggregateWeekly(processedData);
-            } else if (type === "month") {
-                aggregatedDataOne = aggregateMonthly(processedData);
-            } else {
-                aggregatedDataOne = processedData;
-            }
-
+            // The server returns date-ordered entries that are already gap filled or aggregated.
+            const aggregatedDataOne = parseEntries(apiResponse.data);
             let aggregatedDataTwo: ProcessedDataEntry[] = [];
-            if (symbolTwo && symbolTwo !== "None") {
-                if (type === "week") {
-                    aggregatedDataTwo = aggregateWeekly(processedDataTwo);
-                } else if (type === "month") {
-                    aggregatedDataTwo = aggregateMonthly(processedDataTwo);
-                } else {
-                    aggregatedDataTwo = processedDataTwo;
-                }
+            if (symbolTwo && symbolTwo !== "None" && apiResponse.dataTwo) {
+                aggregatedDataTwo = parseEntries(apiResponse.dataTwo);
             }
 
             setCleanedDataMap((prev) => ({
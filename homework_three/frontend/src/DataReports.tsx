@@ -6,13 +6,12 @@ import "./assets/css/DataReports.css";
 import {
     ApiResponse,
     ProcessedDataEntry,
-    processData
+    parseEntries
 } from "./dataCleaning.ts";
 
 import IndicatorChart from "./IndicatorChart";
 
 import { getStrategyParams, TimeFrame } from "./strategyConfig.ts";
-import { aggregateWeekly, aggregateMonthly } from "./dataAggregation.ts";
 import { calculateStrategy } from "./strategies.ts";
 import Modal from './Modal';
 
@@ -176,6 +175,10 @@ const DataReports: React.FC = () => {
         if (symbolTwo && symbolTwo !== "None") {
             url += `&symbolTwo=${encodeURIComponent(symbolTwo)}`;
         }
+        url += `&timeframe=${type}`;
+        if (type === "day") {
+            url += "&fill=true";
+        }
 
         console.log(`Fetching data for strategy ${id} from URL: ${url}`);
 
@@ -186,30 +189,11 @@ const DataReports: React.FC = () => {
             }
             const apiResponse: ApiResponse = await resp.json();
 
-            const processedData = processData(apiResponse.data);
-            let processedDataTwo: ProcessedDataEntry[] = [];
-            if (apiResponse.dataTwo) {
-                processedDataTwo = processData(apiResponse.dataTwo);
-            }
-
-            let aggregatedDataOne: ProcessedDataEntry[];
-            if (type === "week") {
-                aggregatedDataOne = aggregateWeekly(processedData);
-            } else if (type === "month") {
-                aggregatedDataOne = aggregateMonthly(processedData);
-            } else {
-                aggregatedDataOne = processedData;
-            }
-
+            // The server returns date-ordered entries that are already gap filled or aggregated.
+            const aggregatedDataOne = parseEntries(apiResponse.data);
             let aggregatedDataTwo: ProcessedDataEntry[] = [];
-            if (symbolTwo && symbolTwo !== "None") {
-                if (type === "week") {
-                    aggregatedDataTwo = aggregateWeekly(processedDataTwo);
-                } else if (type === "month") {
-                    aggregatedDataTwo = aggregateMonthly(processedDataTwo);
-                } else {
-                    aggregatedDataTwo = processedDataTwo;
-                }
+            if (symbolTwo && symbolTwo !== "None" && apiResponse.dataTwo) {
+                aggregatedDataTwo = parseEntries(apiResponse.dataTwo);
             }
 
             setCleanedDataMap((prev) => ({
@@ -50,8 +50,9 @@ export function aggregateMonthly(data: ProcessedDataEntry[]): ProcessedDataEntry
 function aggregatePeriod(periodData: ProcessedDataEntry[]): ProcessedDataEntry {
     const firstEntry = periodData[0];
     const lastEntry = periodData[periodData.length - 1];
-    const high = Math.max(...periodData.map(d => d.max));
-    const low = Math.min(...periodData.map(d => d.min));
+    // A reduce instead of Math.max(...) keeps long periods clear of the engine's argument count limit.
+    const high = periodData.reduce((highest, d) => Math.max(highest, d.max), -Infinity);
+    const low = periodData.reduce((lowest, d) => Math.min(lowest, d.min), Infinity);
     const volume = periodData.reduce((sum, d) => sum + d.volume, 0);
     const date = lastEntry.date;
 
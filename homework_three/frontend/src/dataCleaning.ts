@@ -1,19 +1,23 @@
+type EntryValue = string | number;
+
 export interface DataEntry {
     date: string;
     symbol: string;
-    avg_price: string;
-    last_trade_price: string;
-    max: string | null;
-    min: string | null;
-    pctchg: string;
-    total_turnover_in_denars: string;
-    turnover_in_best_in_denars: string;
-    volume: string;
+    avg_price: EntryValue;
+    last_trade_price: EntryValue;
+    max: EntryValue | null;
+    min: EntryValue | null;
+    pctchg: EntryValue;
+    total_turnover_in_denars: EntryValue;
+    turnover_in_best_in_denars: EntryValue;
+    volume: EntryValue;
 }
 
 export interface ApiResponse {
     data: DataEntry[];
     dataTwo: DataEntry[];
+    next?: string | null;
+    nextTwo?: string | null;
 }
 
 export interface ProcessedDataEntry {
@@ -30,7 +34,10 @@ export interface ProcessedDataEntry {
 }
 
 
-export function parseNumber(value: string | null | undefined): number {
+export function parseNumber(value: EntryValue | null | undefined): number {
+    if (typeof value === 'number') {
+        return value;
+    }
     if (!value) {
         return 0;
     }
@@ -40,6 +47,31 @@ export function parseNumber(value: string | null | undefined): number {
 }
 
 
+export function parseEntry(entry: DataEntry): ProcessedDataEntry {
+    return {
+        date: entry.date,
+        symbol: entry.symbol,
+        avg_price: parseNumber(entry.avg_price),
+        last_trade_price: parseNumber(entry.last_trade_price),
+        max: parseNumber(entry.max),
+        min: parseNumber(entry.min),
+        pctchg: parseNumber(entry.pctchg),
+        total_turnover_in_denars: parseNumber(entry.total_turnover_in_denars),
+        turnover_in_best_in_denars: parseNumber(entry.turnover_in_best_in_denars),
+        volume: parseNumber(entry.volume),
+    };
+}
+
+
+export function parseEntries(data: DataEntry[]): ProcessedDataEntry[] {
+    if (!data || data.length === 0) {
+        return [];
+    }
+
+    return [...data].sort((a, b) => (a.date > b.date ? 1 : -1)).map(parseEntry);
+}
+
+
 export function generateDateRange(start: string, end: string): string[] {
     const dtStart = new Date(`${start}T00:00:00Z`);
     const dtEnd = new Date(`${end}T00:00:00Z`);
@@ -81,18 +113,7 @@ export function processData(data: DataEntry[]): ProcessedDataEntry[] {
     for (const date of dateRange) {
         const entry = dataMap.get(date);
         if (entry) {
-            const processedEntry: ProcessedDataEntry = {
-                date: entry.date,
-                symbol: entry.symbol,
-                avg_price: parseNumber(entry.avg_price),
-                last_trade_price: parseNumber(entry.last_trade_price),
-                max: parseNumber(entry.max),
-                min: parseNumber(entry.min),
-                pctchg: parseNumber(entry.pctchg),
-                total_turnover_in_denars: parseNumber(entry.total_turnover_in_denars),
-                turnover_in_best_in_denars: parseNumber(entry.turnover_in_best_in_denars),
-                volume: parseNumber(entry.volume),
-            };
+            const processedEntry = parseEntry(entry);
             processedData.push(processedEntry);
             lastKnownEntry = processedEntry;
         } else if (lastKnownEntry) {